@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import hashlib
+from typing import *
+
+
+class ExportManifest:
+	"""Digest of every map's export inputs as of its last successful export"""
+
+	file_name: str = "mapManifest.json"
+
+	def __init__(self, cacheDir: str):
+		self.path: str = os.path.join(cacheDir, ExportManifest.file_name)
+		self.maps: Dict[str, str] = dict()
+		self.fileDigests: Dict[str, tuple] = dict()
+
+		if os.path.isfile(self.path):
+			with open(self.path, "r") as f:
+				self.maps = json.load(f)
+
+	def hashFile(self, path: str) -> str:
+		"""Content digest; only re-read when the file's mtime or size changes"""
+		key: str = os.path.realpath(path)
+		stat = os.stat(key)
+		stamp: tuple = (stat.st_mtime_ns, stat.st_size)
+
+		if key not in self.fileDigests or self.fileDigests[key][0] != stamp:
+			with open(key, "rb") as f:
+				self.fileDigests[key] = (stamp, hashlib.sha1(f.read()).hexdigest())
+		return self.fileDigests[key][1]
+
+	def makeDigest(self, filePaths: Iterable[str], settings: Any) -> str:
+		digest = hashlib.sha1(json.dumps(settings, sort_keys=True).encode())
+		for filePath in sorted(set(filePaths)):
+			digest.update(filePath.encode())
+			digest.update(self.hashFile(filePath).encode() if os.path.isfile(filePath) else b"missing")
+		return digest.hexdigest()
+
+	def isCurrent(self, mapName: str, digest: str, outputs: List[str]) -> bool:
+		return self.maps.get(mapName) == digest and all([os.path.isfile(output) for output in outputs])
+
+	def update(self, mapName: str, digest: str) -> None:
+		self.maps[mapName] = digest
+
+	def save(self) -> None:
+		os.makedirs(os.path.dirname(self.path), exist_ok=True)
+		with open(self.path, "w") as outfile:
+			json.dump(self.maps, outfile, indent="\t")
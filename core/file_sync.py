@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import hashlib
+from typing import *
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+
+class FileSync:
+	"""Mirrors a directory into another, copying only the files whose size or mtime differ
+	(or content, when 'checksum') & deleting only the files gone from the source.
+	Godot's '.import' files are kept as long as their asset is, so it doesn't reimport
+	what didn't change."""
+
+	# ioctl to share a file's blocks with another on copy-on-write filesystems (btrfs, xfs)
+	ficlone: int = 0x40049409
+	chunk_size: int = 1 << 20
+
+	def __init__(self, checksum: bool=False):
+		self.checksum: bool = checksum
+		self.copied: List[str] = list()
+		self.removed: List[str] = list()
+		self.unchanged: int = 0
+
+	def sync(self, srcDir: str, destDir: str) -> None:
+		srcFiles: Set[str] = set()
+		for dirPath, dirNames, fileNames in os.walk(srcDir):
+			relDir: str = os.path.relpath(dirPath, srcDir)
+			os.makedirs(os.path.join(destDir, relDir), exist_ok=True)
+
+			for fileName in fileNames:
+				relPath: str = os.path.normpath(os.path.join(relDir, fileName))
+				srcFiles.add(relPath)
+				self.syncFile(os.path.join(srcDir, relPath), os.path.join(destDir, relPath))
+
+		for dirPath, dirNames, fileNames in os.walk(destDir, topdown=False):
+			relDir = os.path.relpath(dirPath, destDir)
+			for fileName in fileNames:
+				relPath = os.path.normpath(os.path.join(relDir, fileName))
+				if relPath in srcFiles or (relPath.endswith(".import") and relPath[:-len(".import")] in srcFiles):
+					continue
+				os.remove(os.path.join(destDir, relPath))
+				self.removed.append(os.path.join(destDir, relPath))
+
+			if relDir != "." and not os.path.isdir(os.path.join(srcDir, relDir)) and len(os.listdir(dirPath)) == 0:
+				os.rmdir(dirPath)
+
+	def syncFile(self, src: str, dest: str) -> bool:
+		"""Whether 'dest' got copied"""
+		if self.isCurrent(src, dest):
+			self.unchanged += 1
+			return False
+
+		FileSync.copyFile(src, dest)
+		self.copied.append(dest)
+		return True
+
+	def isCurrent(self, src: str, dest: str) -> bool:
+		if not os.path.isfile(dest):
+			return False
+
+		srcStat = os.stat(src)
+		destStat = os.stat(dest)
+		if srcStat.st_size != destStat.st_size:
+			return False
+		if srcStat.st_mtime_ns == destStat.st_mtime_ns:
+			return True
+
+		# same size, touched but maybe not changed: only the mtime needs carrying over
+		if self.checksum and FileSync.hashFile(src) == FileSync.hashFile(dest):
+			shutil.copystat(src, dest)
+			return True
+		return False
+
+	@staticmethod
+	def hashFile(path: str) -> str:
+		digest = hashlib.sha1()
+		with open(path, "rb") as f:
+			for block in iter(lambda: f.read(FileSync.chunk_size), b""):
+				digest.update(block)
+		return digest.hexdigest()
+
+	@staticmethod
+	def copyFile(src: str, dest: str) -> None:
+		"""Copies into a temp file next to 'dest' & swaps it in, so 'dest' is never half written;
+		shares blocks when the filesystem can, else copies in the kernel, else through Python"""
+		tempPath: str = os.path.join(os.path.dirname(dest), ".tmp-" + os.path.basename(dest))
+		try:
+			with open(src, "rb") as fsrc, open(tempPath, "wb") as fdest:
+				if not FileSync._reflink(fsrc, fdest) and not FileSync._copyRange(fsrc, fdest):
+					fsrc.seek(0)
+					fdest.seek(0)
+					fdest.truncate()
+					shutil.copyfileobj(fsrc, fdest, FileSync.chunk_size)
+			shutil.copystat(src, tempPath)
+			os.replace(tempPath, dest)
+		except BaseException:
+			if os.path.exists(tempPath):
+				os.remove(tempPath)
+			raise
+
+	@staticmethod
+	def _reflink(fsrc, fdest) -> bool:
+		if fcntl is None:
+			return False
+		try:
+			fcntl.ioctl(fdest.fileno(), FileSync.ficlone, fsrc.fileno())
+			return True
+		except OSError:
+			return False
+
+	@staticmethod
+	def _copyRange(fsrc, fdest) -> bool:
+		if not hasattr(os, "copy_file_range"):
+			return False
+		remaining: int = os.fstat(fsrc.fileno()).st_size
+		try:
+			while remaining > 0:
+				copied: int = os.copy_file_range(fsrc.fileno(), fdest.fileno(), min(remaining, 1 << 30))
+				if copied == 0:
+					break
+				remaining -= copied
+		except OSError:
+			return False
+		return remaining == 0
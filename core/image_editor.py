@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 import os
-from PIL import Image, ImageFont, ImageDraw, ImageChops
+import numpy as np
+from PIL import Image, ImageFont, ImageDraw
 from enum import Enum, unique
 
 _font_dir = os.path.join(os.path.dirname(__file__), "fonts")
@@ -98,11 +99,15 @@ class ImageEditor:
 
 	@staticmethod
 	def create_overlay(input_path, output_path, overlay_color):
+		"""Multiplies the image by a flat colour in place, rounding down like 'ImageChops.multiply'"""
 		with Image.open(input_path, "r") as img:
-			overlay = Image.new("RGBA", img.size, overlay_color)
-			out = ImageChops.multiply(img, overlay)
-			out.save(output_path)
-			out.close()
+			pixels = np.array(img if img.mode == "RGBA" else img.convert("RGBA"))
+		for channel, value in enumerate(overlay_color):
+			if value == 0:
+				pixels[..., channel] = 0
+			elif value != 255:
+				pixels[..., channel] = pixels[..., channel].astype(np.uint16) * value // 255
+		Image.fromarray(pixels, "RGBA").save(output_path)
 
 	@staticmethod
 	def pad_height(input_path, output_path, frame_height, spacing):
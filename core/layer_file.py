@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import struct
+import numpy as np
+from typing import *
+
+
+class LayerFile:
+	"""Packed tile layers of one zone, all little-endian:
+	'TOWL', uint32 version, then until the end of the file, per layer:
+	uint32 width, uint32 height, layer name & group name (each uint16 length + utf-8),
+	width * height uint32 GIDs row by row"""
+
+	ext: str = ".tiles"
+	magic: bytes = b"TOWL"
+	version: int = 1
+
+	def __init__(self, path: str):
+		self.file = open(path, "wb")
+		self.file.write(self.magic + struct.pack("<I", self.version))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def close(self) -> None:
+		self.file.close()
+
+	def write(self, groupName: str, layerName: str, matrix: np.ndarray) -> int:
+		"""Byte offset of the written layer"""
+		offset: int = self.file.tell()
+		self._writeHeader(groupName, layerName, matrix)
+		self.file.write(matrix.astype("<u4").tobytes())
+		return offset
+
+	def _writeHeader(self, groupName: str, layerName: str, matrix: np.ndarray) -> None:
+		self.file.write(struct.pack("<II", matrix.shape[1], matrix.shape[0]))
+		for name in [layerName, groupName]:
+			encoded: bytes = name.encode("UTF-8")
+			self.file.write(struct.pack("<H", len(encoded)) + encoded)
+
+	@staticmethod
+	def _readHeader(buffer: bytes, offset: int) -> Tuple[int, int, str, str, int]:
+		"""(width, height, groupName, layerName, offset past the header)"""
+		width, height = struct.unpack_from("<II", buffer, offset)
+		offset += 8
+
+		names: list = list()
+		for _ in range(2):
+			size: int = struct.unpack_from("<H", buffer, offset)[0]
+			names.append(buffer[offset + 2:offset + 2 + size].decode("UTF-8"))
+			offset += 2 + size
+
+		return width, height, names[1], names[0], offset
+
+	@staticmethod
+	def read(path: str) -> List[Tuple[str, str, np.ndarray]]:
+		"""[(groupName, layerName, matrix)] in file order"""
+		layers: List[Tuple[str, str, np.ndarray]] = list()
+
+		with open(path, "rb") as f:
+			buffer: bytes = f.read()
+		if buffer[:4] != LayerFile.magic:
+			raise ValueError("not a layer file: (%s)" % path)
+
+		offset: int = 8
+		while offset < len(buffer):
+			width, height, groupName, layerName, offset = LayerFile._readHeader(buffer, offset)
+			matrix = np.frombuffer(buffer, dtype="<u4", count=width * height, offset=offset)
+			layers.append((groupName, layerName, matrix.astype(np.uint32).reshape(height, width)))
+			offset += width * height * 4
+
+		return layers
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import struct
+import numpy as np
+from typing import *
+
+from .layer_file import LayerFile
+
+
+class LayerRunFile(LayerFile):
+	"""Run-length encoded tile layers of one zone, all little-endian:
+	'TOWR', uint32 version, then per layer the 'LayerFile' layer header,
+	uint32 run count & that many (row, start column, length, GID) uint32 runs.
+	Empty cells aren't stored, so a layer can be filled a run at a time."""
+
+	ext: str = ".runs"
+	magic: bytes = b"TOWR"
+	version: int = 1
+
+	def __init__(self, path: str):
+		super().__init__(path)
+		# (groupName, layerName, cells, runs) of every written layer
+		self.stats: List[Tuple[str, str, int, int]] = list()
+
+	def write(self, groupName: str, layerName: str, matrix: np.ndarray) -> int:
+		"""Byte offset of the written layer"""
+		offset: int = self.file.tell()
+		runs: np.ndarray = LayerRunFile.getRuns(matrix)
+		self._writeHeader(groupName, layerName, matrix)
+		self.file.write(struct.pack("<I", runs.shape[0]))
+		self.file.write(runs.astype("<u4").tobytes())
+		self.stats.append((groupName, layerName, matrix.size, runs.shape[0]))
+		return offset
+
+	@staticmethod
+	def getRuns(matrix: np.ndarray) -> np.ndarray:
+		"""(runs x 4) array of (row, start column, length, GID), row by row; runs of 0 are left out"""
+		rows, columns = matrix.shape
+		if matrix.size == 0:
+			return np.zeros((0, 4), dtype=np.uint32)
+
+		# a run starts at each row start & wherever the GID differs from its left neighbour
+		starts: np.ndarray = np.ones(matrix.shape, dtype=bool)
+		starts[:, 1:] = matrix[:, 1:] != matrix[:, :-1]
+		flatStarts: np.ndarray = np.flatnonzero(starts)
+		lengths: np.ndarray = np.diff(np.append(flatStarts, matrix.size))
+
+		runs: np.ndarray = np.stack([
+			flatStarts // columns,
+			flatStarts % columns,
+			lengths,
+			matrix.reshape(-1)[flatStarts]
+		], axis=1).astype(np.uint32)
+		return runs[runs[:, 3] != 0]
+
+	@staticmethod
+	def fromRuns(runs: np.ndarray, width: int, height: int) -> np.ndarray:
+		"""Inverse of 'getRuns'"""
+		flat: np.ndarray = np.zeros(width * height, dtype=np.uint32)
+		starts: np.ndarray = runs[:, 0].astype(np.int64) * width + runs[:, 1]
+		lengths: np.ndarray = runs[:, 2].astype(np.int64)
+
+		# cell indices of every run, without a python loop over the runs
+		cells: np.ndarray = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+		flat[cells] = np.repeat(runs[:, 3], lengths)
+		return flat.reshape(height, width)
+
+	@staticmethod
+	def getRatio(cells: int, runs: int) -> float:
+		"""How many times smaller the runs are than the plain layer"""
+		return cells / max(1, runs * 4)
+
+	@staticmethod
+	def read(path: str) -> List[Tuple[str, str, np.ndarray]]:
+		"""[(groupName, layerName, matrix)] in file order"""
+		layers: List[Tuple[str, str, np.ndarray]] = list()
+
+		with open(path, "rb") as f:
+			buffer: bytes = f.read()
+		if buffer[:4] != LayerRunFile.magic:
+			raise ValueError("not a layer run file: (%s)" % path)
+
+		offset: int = 8
+		while offset < len(buffer):
+			width, height, groupName, layerName, offset = LayerFile._readHeader(buffer, offset)
+			count: int = struct.unpack_from("<I", buffer, offset)[0]
+			offset += 4
+
+			runs = np.frombuffer(buffer, dtype="<u4", count=count * 4, offset=offset).reshape(-1, 4)
+			layers.append((groupName, layerName, LayerRunFile.fromRuns(runs, width, height)))
+			offset += count * 16
+
+		return layers
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import hashlib
+import numpy as np
+from PIL import Image
+from typing import *
+
+from .tile_matrix import TileMatrix
+
+
+class LightMap:
+	"""Static light of a zone, a texel per cell: every light's falloff added up, with the texels
+	a light can't see past occluded cells left dark"""
+
+	ext: str = ".png"
+	cache_ext: str = ".npz"
+	version: int = 1
+
+	def __init__(self, width: int, height: int, lightPos: Dict[int, list], cellSize: int, radius: int):
+		"""'lightPos' is {gid: [x, y, tileHeight]} of the tiles giving light; those lights
+		& lights without a size reach 'radius' pixels"""
+		self.width: int = width
+		self.height: int = height
+		self.lightPos: Dict[int, list] = lightPos
+		self.cellSize: int = cellSize
+		self.radius: int = radius
+		# (x, y, radius) in pixels
+		self.sources: List[Tuple[float, float, float]] = list()
+		self.lightIds: List[int] = list()
+
+	def addLayer(self, matrix: np.ndarray) -> None:
+		"""Lights of the placed tiles that have a light position"""
+		tiles: np.ndarray = TileMatrix.clearFlips(matrix)
+		for gid, (x, y, tileHeight) in self.lightPos.items():
+			rows, columns = np.nonzero(tiles == gid)
+			flipped: np.ndarray = (matrix[rows, columns] & np.uint32(TileMatrix.flip_mask)) != 0
+
+			lightX: np.ndarray = columns * self.cellSize + np.where(flipped, self.cellSize - x, x)
+			lightY: np.ndarray = (rows + 1) * self.cellSize - tileHeight + y
+			self.sources += [(float(lx), float(ly), float(self.radius)) for lx, ly in zip(lightX, lightY)]
+
+	def addObjects(self, mapIndex) -> None:
+		"""Objects of the 'lights' groups, reaching as far as the 'lightSpace' linked to them
+		or else half their size"""
+		lightSpaces: Dict[str, float] = dict()
+		for item in mapIndex.getObjects("lightSpace"):
+			connectedLight: Optional[str] = mapIndex.getProperty(item, "light")
+			if connectedLight is not None:
+				lightSpaces[connectedLight] = float(item.get("width", 0))
+
+		for item in mapIndex.getObjects("lights"):
+			width: float = float(item.get("width", 0))
+			height: float = float(item.get("height", 0))
+			# tile objects stand on their position, the rest hang from it
+			y: float = float(item.get("y")) + (-height if "gid" in item.keys() else height) / 2.0
+
+			size: float = lightSpaces.get(item.get("id"), max(width, height))
+			self.sources.append((float(item.get("x")) + width / 2.0, y, size / 2.0 if size > 0 else float(self.radius)))
+			self.lightIds.append(int(item.get("id")))
+
+	def getDigest(self, occluded: np.ndarray) -> str:
+		digest = hashlib.sha1(json.dumps([LightMap.version, self.cellSize, self.sources]).encode())
+		digest.update(np.packbits(occluded).tobytes())
+		return digest.hexdigest()
+
+	def bake(self, occluded: np.ndarray) -> np.ndarray:
+		"""(rows x columns) light from 0 to 1"""
+		light: np.ndarray = np.zeros((self.height, self.width), dtype=np.float32)
+		cellSize: int = self.cellSize
+
+		for x, y, radius in self.sources:
+			if radius <= 0:
+				continue
+
+			# texels around the light
+			first: np.ndarray = np.maximum(np.floor(np.array([x - radius, y - radius]) / cellSize).astype(int), 0)
+			last: np.ndarray = np.minimum(np.ceil(np.array([x + radius, y + radius]) / cellSize).astype(int),
+				[self.width, self.height])
+			if np.any(last <= first):
+				continue
+			columns, rows = np.meshgrid(np.arange(first[0], last[0]), np.arange(first[1], last[1]))
+			texelX: np.ndarray = (columns + 0.5) * cellSize
+			texelY: np.ndarray = (rows + 0.5) * cellSize
+
+			falloff: np.ndarray = np.clip(1.0 - np.hypot(texelX - x, texelY - y) / radius, 0.0, 1.0) ** 2
+			lit: np.ndarray = falloff > 0
+			rows, columns, falloff = rows[lit], columns[lit], falloff[lit]
+
+			# march from the light to each texel at half a cell a step; the cell the light is in
+			# & the texel's own cell don't shadow, so occluders still get lit on their face
+			steps: np.ndarray = np.linspace(0.0, 1.0, max(2, int(np.ceil(2.0 * radius / cellSize)) + 1))[1:-1]
+			sampleX: np.ndarray = x + np.outer(texelX[lit] - x, steps)
+			sampleY: np.ndarray = y + np.outer(texelY[lit] - y, steps)
+			sampleColumns: np.ndarray = np.clip((sampleX // cellSize).astype(int), 0, self.width - 1)
+			sampleRows: np.ndarray = np.clip((sampleY // cellSize).astype(int), 0, self.height - 1)
+
+			lightCell: tuple = (int(y // cellSize), int(x // cellSize))
+			shadows: np.ndarray = occluded[sampleRows, sampleColumns] \
+				& ((sampleRows != rows[:, None]) | (sampleColumns != columns[:, None])) \
+				& ((sampleRows != lightCell[0]) | (sampleColumns != lightCell[1]))
+			visible: np.ndarray = ~shadows.any(axis=1)
+
+			np.add.at(light, (rows[visible], columns[visible]), falloff[visible])
+
+		return np.clip(light, 0.0, 1.0)
+
+	def bakeCached(self, occluded: np.ndarray, cachePath: str) -> Tuple[np.ndarray, bool]:
+		"""(light, whether it came from the cache at 'cachePath'); the cache is keyed by every bake input"""
+		digest: str = self.getDigest(occluded)
+		if os.path.isfile(cachePath):
+			with np.load(cachePath) as data:
+				if str(data["digest"]) == digest:
+					return data["light"], True
+
+		light: np.ndarray = self.bake(occluded)
+		os.makedirs(os.path.dirname(cachePath), exist_ok=True)
+		with open(cachePath, "wb") as outfile:
+			np.savez(outfile, digest=np.array(digest), light=light)
+		return light, False
+
+	@staticmethod
+	def save(dest: str, light: np.ndarray) -> None:
+		Image.fromarray(np.round(light * 255.0).astype(np.uint8), "L").save(dest)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+import json
+import numpy as np
+from typing import *
+
+from .layer_file import LayerFile
+
+
+class MapChunks:
+	"""Splits a zone into square chunks of cells for streamed loading.
+	Chunk layers go one after another into a single layer file; the index json has per chunk
+	(keyed 'column,row') its cell bounds, the byte offset of each of its layers & the objects
+	standing in it. Chunks with neither tiles nor objects are left out."""
+
+	ext: str = ".json"
+
+	def __init__(self, dest: str, chunkSize: int, cellSize: int):
+		"""'dest' is the path without extension of both the layer file and the index"""
+		self.dest: str = dest
+		self.chunkSize: int = chunkSize
+		self.cellSize: int = cellSize
+		self.chunks: Dict[Tuple[int, int], dict] = dict()
+		self.layerFile: LayerFile = LayerFile(dest + LayerFile.ext)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.layerFile.close()
+
+	def _getChunk(self, column: int, row: int) -> dict:
+		if (column, row) not in self.chunks:
+			size: int = self.chunkSize
+			self.chunks[(column, row)] = {
+				"bounds": [column * size, row * size, size, size],
+				"layers": list(),
+				"objects": dict()
+			}
+		return self.chunks[(column, row)]
+
+	def addLayer(self, groupName: str, layerName: str, matrix: np.ndarray) -> None:
+		size: int = self.chunkSize
+		rows: int = -(-matrix.shape[0] // size)
+		columns: int = -(-matrix.shape[1] // size)
+
+		# which chunks have any tile, without slicing every one of them
+		padded: np.ndarray = np.zeros((rows * size, columns * size), dtype=bool)
+		padded[:matrix.shape[0], :matrix.shape[1]] = matrix != 0
+		filled: np.ndarray = padded.reshape(rows, size, columns, size).any(axis=(1, 3))
+
+		for row, column in zip(*np.nonzero(filled)):
+			chunk: dict = self._getChunk(int(column), int(row))
+			chunk["layers"].append({
+				"group": groupName,
+				"layer": layerName,
+				"offset": self.layerFile.write(groupName, layerName,
+					matrix[row * size:(row + 1) * size, column * size:(column + 1) * size])
+			})
+
+	def addObjects(self, mapIndex) -> None:
+		"""Objects of every object group, placed by their x & y"""
+		chunkPx: int = self.chunkSize * self.cellSize
+		# quest groups can sit in nested groups
+		for groupName, item in mapIndex.getAllObjects(True):
+			x: float = max(0.0, float(item.get("x", 0)))
+			y: float = max(0.0, float(item.get("y", 0)))
+			chunk: dict = self._getChunk(int(x // chunkPx), int(y // chunkPx))
+			chunk["objects"].setdefault(groupName, []).append({
+				"id": int(item.get("id")),
+				"name": item.get("name", ""),
+				"x": x,
+				"y": y
+			})
+
+	def save(self, mapSize: Tuple[int, int]) -> None:
+		"""'mapSize' is (columns, rows) in cells; edge chunk bounds are clipped to it"""
+		for chunk in self.chunks.values():
+			bounds: list = chunk["bounds"]
+			bounds[2] = max(0, min(bounds[2], mapSize[0] - bounds[0]))
+			bounds[3] = max(0, min(bounds[3], mapSize[1] - bounds[1]))
+
+		index: dict = {
+			"chunkSize": self.chunkSize,
+			"width": mapSize[0],
+			"height": mapSize[1],
+			"chunks": {"%d,%d" % key: self.chunks[key] for key in sorted(self.chunks)}
+		}
+		with open(self.dest + MapChunks.ext, "w") as outfile:
+			json.dump(index, outfile, indent="\t")
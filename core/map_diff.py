@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from typing import *
+
+
+class MapDiff:
+	"""Differences between two versions of a map: tile layers as (groupName, layerName) -> matrix,
+	objects as objectgroup name -> {object id: (x, y)}"""
+
+	@staticmethod
+	def getObjects(mapIndex) -> Dict[str, Dict[int, Tuple[float, float]]]:
+		objects: Dict[str, Dict[int, Tuple[float, float]]] = dict()
+		for groupName, item in mapIndex.getAllObjects(True):
+			objects.setdefault(groupName, dict())[int(item.get("id"))] = (float(item.get("x", 0)), float(item.get("y", 0)))
+		return objects
+
+	@staticmethod
+	def diffLayers(old: Dict[Tuple[str, str], np.ndarray], new: Dict[Tuple[str, str], np.ndarray],
+		chunkSize: int) -> Dict[Tuple[str, str], dict]:
+		"""Changed layers only: {"status": "added" | "removed" | "resized" | "changed"}, changed ones
+		also with their changed cell count, bounds [x, y, w, h] in cells & changed chunks [(column, row)]"""
+		layers: Dict[Tuple[str, str], dict] = dict()
+
+		for key in list(old) + [key for key in new if key not in old]:
+			if key not in new:
+				layers[key] = {"status": "removed"}
+			elif key not in old:
+				layers[key] = {"status": "added"}
+			elif old[key].shape != new[key].shape:
+				layers[key] = {"status": "resized", "from": list(old[key].shape[::-1]), "to": list(new[key].shape[::-1])}
+			else:
+				changed: np.ndarray = old[key] != new[key]
+				rows: np.ndarray = np.flatnonzero(changed.any(axis=1))
+				if rows.size == 0:
+					continue
+				columns: np.ndarray = np.flatnonzero(changed.any(axis=0))
+
+				# changed chunks straight from the changed cells' coordinates
+				cellRows, cellColumns = np.nonzero(changed)
+				chunks: np.ndarray = np.unique(np.stack([cellColumns // chunkSize, cellRows // chunkSize], axis=1), axis=0)
+
+				layers[key] = {
+					"status": "changed",
+					"cells": int(np.count_nonzero(changed)),
+					"bounds": [int(columns[0]), int(rows[0]), int(columns[-1] - columns[0] + 1), int(rows[-1] - rows[0] + 1)],
+					"chunks": [tuple(chunk) for chunk in chunks.tolist()]
+				}
+
+		return layers
+
+	@staticmethod
+	def diffObjects(old: Dict[str, Dict[int, tuple]], new: Dict[str, Dict[int, tuple]]) -> Dict[str, dict]:
+		"""Object groups with changes: {"added": [ids], "removed": [ids], "moved": [ids]}"""
+		groups: Dict[str, dict] = dict()
+
+		for name in list(old) + [name for name in new if name not in old]:
+			before: Dict[int, tuple] = old.get(name, dict())
+			after: Dict[int, tuple] = new.get(name, dict())
+			changes: dict = {
+				"added": sorted(set(after) - set(before)),
+				"removed": sorted(set(before) - set(after)),
+				"moved": sorted([objectId for objectId in set(before) & set(after) if before[objectId] != after[objectId]])
+			}
+			if any(changes.values()):
+				groups[name] = changes
+
+		return groups
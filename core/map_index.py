@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import xml.etree.ElementTree as ET
+from typing import *
+
+
+class MapIndex:
+	"""A map document walked once: tilesets in document order, the layers the exporter remaps,
+	objects & object groups by object group name & the properties of every object. Elements are
+	the document's own, so attribute edits show through; adding or removing tilesets goes
+	through the index."""
+
+	def __init__(self, root):
+		self.root = root
+		self.tilesets: List[ET.Element] = list()
+		# (groupName, layer) of the layers right under a top level group, what the exporter remaps
+		self.groupLayers: List[Tuple[str, ET.Element]] = list()
+		# name -> [(right under a top level group, element)]
+		self.objectGroups: Dict[str, List[Tuple[bool, ET.Element]]] = dict()
+		self.objects: Dict[str, List[Tuple[bool, ET.Element]]] = dict()
+		self.groupObjects: Dict[ET.Element, List[ET.Element]] = dict()
+		self.properties: Dict[ET.Element, Dict[str, str]] = dict()
+
+		for item in root:
+			if item.tag == "tileset":
+				self.tilesets.append(item)
+			elif item.tag == "group":
+				self._walkGroup(item, True)
+			else:
+				self._walkGroup(item, False, item)
+
+	def _walkGroup(self, group, topLevel: bool, item=None) -> None:
+		"""'item' when the element to index isn't a group's child but the element itself"""
+		for child in ([item] if item is not None else list(group)):
+			if child.tag == "layer":
+				if topLevel:
+					self.groupLayers.append((group.get("name"), child))
+
+			elif child.tag == "objectgroup":
+				name: str = child.get("name")
+				self.objectGroups.setdefault(name, []).append((topLevel, child))
+				objects: list = self.objects.setdefault(name, [])
+				self.groupObjects[child] = child.findall("object")
+				for mapObject in self.groupObjects[child]:
+					objects.append((topLevel, mapObject))
+					for properties in mapObject.findall("properties"):
+						self.properties[mapObject] = {
+							objectProperty.get("name"): objectProperty.get("value") for objectProperty in properties
+						}
+
+			elif child.tag == "group":
+				self._walkGroup(child, False)
+
+	def getObjects(self, groupName: str, nested: bool=False) -> List[ET.Element]:
+		"""Objects of the object groups named 'groupName' right under a top level group,
+		or at any depth when 'nested'"""
+		return [item for topLevel, item in self.objects.get(groupName, []) if topLevel or nested]
+
+	def getObjectGroups(self, groupName: str, nested: bool=False) -> List[ET.Element]:
+		return [item for topLevel, item in self.objectGroups.get(groupName, []) if topLevel or nested]
+
+	def getGroupObjects(self, objectGroup) -> List[ET.Element]:
+		return self.groupObjects.get(objectGroup, [])
+
+	def getAllObjects(self, nested: bool=False) -> Iterator[Tuple[str, ET.Element]]:
+		"""(object group name, object) of every object"""
+		for groupName, objects in self.objects.items():
+			for topLevel, item in objects:
+				if topLevel or nested:
+					yield groupName, item
+
+	def getProperties(self, item) -> Dict[str, str]:
+		return self.properties.get(item, dict())
+
+	def getProperty(self, item, name: str) -> Optional[str]:
+		return self.getProperties(item).get(name)
+
+	def getTilesets(self) -> Dict[int, ET.Element]:
+		"""firstgid -> tileset, as the document has them now"""
+		return {int(item.get("firstgid")): item for item in self.tilesets}
+
+	def removeTileset(self, item) -> None:
+		self.root.remove(item)
+		self.tilesets.remove(item)
+
+	def replaceTilesets(self, tilesets: List[ET.Element]) -> None:
+		"""Puts 'tilesets' where the document's tilesets start"""
+		position: int = list(self.root).index(self.tilesets[0]) if len(self.tilesets) > 0 else 0
+		tail: str = self.tilesets[0].tail if len(self.tilesets) > 0 else "\n "
+
+		for item in self.tilesets:
+			self.root.remove(item)
+		for i, item in enumerate(tilesets):
+			item.tail = tail
+			self.root.insert(position + i, item)
+		self.tilesets = list(tilesets)
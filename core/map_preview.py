@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+import os
+import hashlib
+import numpy as np
+from typing import *
+
+from .tile_matrix import TileMatrix
+
+
+class MapPreview:
+	"""Zone images drawn from tile layers at 'scale' pixels a cell, a chunk of cells at a time.
+	Each chunk is cached under the digest of everything it's drawn from, so after an edit
+	only the chunks with changed cells get drawn again."""
+
+	chunk_size: int = 32
+
+	def __init__(self, tilesets: List[Tuple[int, np.ndarray]], cellSize: int, scale: int, tilesetDigest: str):
+		"""'tilesets' is [(firstgid, cells)], cells as 'TileAtlas.loadCells' gives them"""
+		self.scale: int = scale
+		self.tilesetDigest: str = tilesetDigest
+		factor: int = cellSize // scale
+
+		# tiles taller than a cell are split in cell high parts, drawn on the rows above theirs
+		self.partCount: int = max([cells.shape[1] // cellSize for _, cells in tilesets], default=1)
+		size: int = max([firstgid + cells.shape[0] for firstgid, cells in tilesets], default=1)
+
+		# gid -> parts from the bottom up, premultiplied & downscaled
+		self.parts: np.ndarray = np.zeros((size, self.partCount, scale, scale, 4), dtype=np.float32)
+		for firstgid, cells in tilesets:
+			count, height = cells.shape[:2]
+			rgba: np.ndarray = cells.astype(np.float32) / 255.0
+			rgba[..., :3] *= rgba[..., 3:]
+
+			small: np.ndarray = rgba.reshape(count, height // factor, factor, scale, factor, 4).mean(axis=(2, 4))
+			parts: int = height // cellSize
+			self.parts[firstgid:firstgid + count, :parts] = small.reshape(count, parts, scale, scale, 4)[:, ::-1]
+
+	def render(self, layers: List[np.ndarray], cacheDir: str) -> Tuple[np.ndarray, int, int]:
+		"""(RGBA image, chunks drawn, chunks from the cache); layers are drawn in order.
+		Cached chunks no longer part of the zone are removed from 'cacheDir'."""
+		height: int = max([matrix.shape[0] for matrix in layers], default=0)
+		width: int = max([matrix.shape[1] for matrix in layers], default=0)
+		size: int = MapPreview.chunk_size
+		rows: int = -(-height // size) * size
+		columns: int = -(-width // size) * size
+
+		# tall tiles below a chunk reach up into it
+		padded: List[np.ndarray] = list()
+		for matrix in layers:
+			grid: np.ndarray = np.zeros((rows + self.partCount - 1, columns), dtype=np.uint32)
+			grid[:matrix.shape[0], :matrix.shape[1]] = matrix
+			padded.append(grid)
+
+		image: np.ndarray = np.zeros((rows * self.scale, columns * self.scale, 4), dtype=np.uint8)
+		os.makedirs(cacheDir, exist_ok=True)
+		used: set = set()
+		drawn: int = 0
+		cached: int = 0
+
+		for row in range(0, rows, size):
+			for column in range(0, columns, size):
+				chunkLayers: List[np.ndarray] = [
+					grid[row:row + size + self.partCount - 1, column:column + size] for grid in padded
+				]
+				if not any([chunk.any() for chunk in chunkLayers]):
+					continue
+
+				digest = hashlib.sha1(("%s-%d" % (self.tilesetDigest, self.scale)).encode())
+				for chunk in chunkLayers:
+					digest.update(np.ascontiguousarray(chunk).astype("<u4").tobytes())
+				fileName: str = digest.hexdigest() + ".npy"
+				cachePath: str = os.path.join(cacheDir, fileName)
+				used.add(fileName)
+
+				if os.path.isfile(cachePath):
+					pixels: np.ndarray = np.load(cachePath)
+					cached += 1
+				else:
+					pixels = MapPreview._toRgba(self.renderChunk(chunkLayers))
+					np.save(cachePath, pixels)
+					drawn += 1
+
+				image[row * self.scale:(row + size) * self.scale, column * self.scale:(column + size) * self.scale] = pixels
+
+		for fileName in os.listdir(cacheDir):
+			if fileName not in used:
+				os.remove(os.path.join(cacheDir, fileName))
+
+		return image[:height * self.scale, :width * self.scale], drawn, cached
+
+	def renderChunk(self, layers: List[np.ndarray]) -> np.ndarray:
+		"""Premultiplied chunk; 'layers' hold the chunk's gids & the rows below it that tall tiles reach from"""
+		rows: int = layers[0].shape[0] - (self.partCount - 1)
+		columns: int = layers[0].shape[1]
+		scale: int = self.scale
+		canvas: np.ndarray = np.zeros((rows * scale, columns * scale, 4), dtype=np.float32)
+
+		for matrix in layers:
+			tiles: np.ndarray = TileMatrix.clearFlips(matrix)
+			tiles = np.where(tiles < self.parts.shape[0], tiles, 0)
+			flipped: np.ndarray = (matrix & np.uint32(TileMatrix.flip_mask)) != 0
+
+			# part 'i' of the tile a row is on lands 'i' rows up; rows are drawn top down, so
+			# the upper parts go over the bottom of the tile above them
+			for i in range(self.partCount):
+				parts: np.ndarray = self.parts[tiles[i:i + rows], i]
+				parts = np.where(flipped[i:i + rows, :, None, None, None], parts[:, :, :, ::-1], parts)
+				parts = parts.transpose(0, 2, 1, 3, 4).reshape(rows * scale, columns * scale, 4)
+				canvas = parts + canvas * (1.0 - parts[..., 3:])
+
+		return canvas
+
+	@staticmethod
+	def downscale(image: np.ndarray, factor: int) -> np.ndarray:
+		"""Averages 'factor' square blocks of an RGBA image, weighting colours by alpha"""
+		height, width = image.shape[0] // factor * factor, image.shape[1] // factor * factor
+		rgba: np.ndarray = image[:height, :width].astype(np.float32) / 255.0
+		rgba[..., :3] *= rgba[..., 3:]
+		small: np.ndarray = rgba.reshape(height // factor, factor, width // factor, factor, 4).mean(axis=(1, 3))
+		return MapPreview._toRgba(small)
+
+	@staticmethod
+	def _toRgba(premultiplied: np.ndarray) -> np.ndarray:
+		alpha: np.ndarray = premultiplied[..., 3:]
+		with np.errstate(divide="ignore", invalid="ignore"):
+			rgb: np.ndarray = np.where(alpha > 0, premultiplied[..., :3] / alpha, 0.0)
+		return np.round(np.clip(np.concatenate([rgb, alpha], axis=-1), 0.0, 1.0) * 255.0).astype(np.uint8)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from typing import *
+
+from .tile_matrix import TileMatrix
+
+
+class MapStats:
+	"""Asset cost of a zone: tiles per tileset & per layer, distinct GIDs, objects per group
+	& the texture memory of the tilesets it uses"""
+
+	bytes_per_pixel: int = 4
+
+	def __init__(self, hierarch: dict, tileHeights: Dict[str, int], cellSize: int):
+		"""'hierarch' is the hierarchy table, tileset name -> (level, cells, firstgid)"""
+		self.tilesets: List[Tuple[str, int, int]] = sorted(
+			[(name, firstgid, cells) for name, (_, cells, firstgid) in hierarch.items()], key=lambda t: t[1])
+		self.size: int = max([firstgid + cells for _, firstgid, cells in self.tilesets], default=1)
+		# texture bytes a tile of each tileset takes
+		self.tileBytes: Dict[str, int] = {
+			name: cellSize * tileHeights[name] * MapStats.bytes_per_pixel for name, _, _ in self.tilesets
+		}
+
+	def countTiles(self, matrix: np.ndarray) -> np.ndarray:
+		"""Placed tiles per GID, flip bit cleared; GIDs past the hierarchy are counted at 0"""
+		tiles: np.ndarray = TileMatrix.clearFlips(matrix).ravel()
+		tiles = np.where(tiles < self.size, tiles, 0)
+		counts: np.ndarray = np.bincount(tiles, minlength=self.size)
+		counts[0] = 0
+		return counts
+
+	def perTileset(self, counts: np.ndarray) -> Dict[str, int]:
+		"""Tileset name -> total of 'counts' over its GIDs, tilesets without tiles left out"""
+		totals: Dict[str, int] = dict()
+		for name, firstgid, cells in self.tilesets:
+			total: int = int(counts[firstgid:firstgid + cells].sum())
+			if total > 0:
+				totals[name] = total
+		return totals
+
+	def getStats(self, layers: Dict[Tuple[str, str], np.ndarray], mapIndex) -> dict:
+		total: np.ndarray = np.zeros(self.size, dtype=np.int64)
+		layerStats: Dict[str, dict] = dict()
+
+		for (groupName, layerName), matrix in layers.items():
+			counts: np.ndarray = self.countTiles(matrix)
+			total += counts
+			layerStats["%s/%s" % (groupName, layerName)] = {
+				"tiles": int(counts.sum()),
+				"distinctGids": int(np.count_nonzero(counts)),
+				"tilesets": self.perTileset(counts)
+			}
+
+		used: np.ndarray = total > 0
+		tilesets: Dict[str, int] = self.perTileset(total)
+		return {
+			"tiles": int(total.sum()),
+			"distinctGids": int(np.count_nonzero(used)),
+			"tilesets": tilesets,
+			"layers": layerStats,
+			"objects": {
+				groupName: len(mapIndex.getObjects(groupName, True)) for groupName in mapIndex.objects
+			},
+			# whole tilesets as loaded now, against atlases of only the used tiles
+			"textureBytes": sum([
+				cells * self.tileBytes[name] for name, _, cells in self.tilesets if name in tilesets
+			]),
+			"trimmedTextureBytes": sum([
+				int(np.count_nonzero(used[firstgid:firstgid + cells])) * self.tileBytes[name]
+				for name, firstgid, cells in self.tilesets
+			])
+		}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import re
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import *
+
+from .tile_matrix import TileMatrix
+
+
+class MapStream:
+	"""Reads maps a <layer> at a time, so memory stays proportional to one layer"""
+
+	layer_marker: str = "@@layer:%d@@"
+	layer_path: List[str] = ["map", "group", "layer", "data"]
+
+	@staticmethod
+	def _isStreamedData(tags: List[str], elem) -> bool:
+		"""Data of a layer right under a top level group; what the exporter remaps"""
+		return tags == MapStream.layer_path and TileMatrix.isTileData(elem)
+
+	@staticmethod
+	def iterLayers(mapPath: str) -> Iterator[Tuple[str, Optional[ET.Element]]]:
+		"""Yields (groupName, layer) for each layer under a top level group, in document order;
+		a (groupName, None) entry starts every group. Layers are cleared once consumed."""
+		tags: List[str] = list()
+		groupName: str = ""
+
+		for event, elem in ET.iterparse(mapPath, events=("start", "end")):
+			if event == "start":
+				tags.append(elem.tag)
+				if tags == MapStream.layer_path[:2]:
+					groupName = elem.get("name")
+					yield groupName, None
+				continue
+
+			if tags == MapStream.layer_path[:3]:
+				yield groupName, elem
+				elem.clear()
+			tags.pop()
+
+	@staticmethod
+	def iterMatrices(mapPath: str) -> Iterator[Tuple[str, str, Any]]:
+		"""Yields (groupName, layerName, matrix) for each tile layer under a top level group"""
+		for groupName, layer in MapStream.iterLayers(mapPath):
+			if layer is None:
+				continue
+
+			data = layer.find("data")
+			if TileMatrix.isTileData(data):
+				yield groupName, layer.get("name"), TileMatrix.fromData(data, int(layer.get("width")))
+
+	@staticmethod
+	def parseSkeleton(mapPath: str) -> ET.ElementTree:
+		"""Whole map but the streamed layer data, which is swapped for numbered markers"""
+		tags: List[str] = list()
+		root = None
+		count: int = 0
+
+		for event, elem in ET.iterparse(mapPath, events=("start", "end")):
+			if event == "start":
+				tags.append(elem.tag)
+				if root is None:
+					root = elem
+				continue
+
+			if MapStream._isStreamedData(tags, elem):
+				elem.text = MapStream.layer_marker % count
+				count += 1
+			tags.pop()
+
+		return ET.ElementTree(root)
+
+	@staticmethod
+	def writeMap(skeleton: ET.ElementTree, mapPath: str, dest: str, transform: Callable) -> None:
+		"""Writes 'skeleton' to 'dest', filling each marker with the matching layer of 'mapPath'
+		passed through 'transform(groupName, layerName, matrix) -> str'"""
+		buffer = io.BytesIO()
+		skeleton.write(buffer, encoding="UTF-8", xml_declaration=True)
+		parts: List[bytes] = re.split(rb"@@layer:(\d+)@@", buffer.getvalue())
+		buffer.close()
+
+		# written next to 'dest' & swapped in once whole, so a failed export leaves no half map
+		fd, tempPath = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(os.path.abspath(dest)))
+		try:
+			with os.fdopen(fd, "wb") as outfile:
+				outfile.write(parts[0])
+				i: int = 1
+				for groupName, layerName, matrix in MapStream.iterMatrices(mapPath):
+					if i >= len(parts) or int(parts[i]) != i // 2:
+						raise ValueError("map (%s) changed while streaming" % mapPath)
+
+					outfile.write(transform(groupName, layerName, matrix).encode("UTF-8"))
+					outfile.write(parts[i + 1])
+					i += 2
+
+			if i != len(parts):
+				raise ValueError("map (%s) changed while streaming" % mapPath)
+
+			if os.path.isfile(dest):
+				shutil.copymode(dest, tempPath)
+			else:
+				umask: int = os.umask(0)
+				os.umask(umask)
+				os.chmod(tempPath, 0o666 & ~umask)
+			os.replace(tempPath, dest)
+		except BaseException:
+			if os.path.exists(tempPath):
+				os.remove(tempPath)
+			raise
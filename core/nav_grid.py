@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import struct
+import numpy as np
+from typing import *
+
+from .tile_matrix import TileMatrix
+
+
+class NavGrid:
+	"""Blocked cells of a zone & the connected regions of the walkable ones, little-endian:
+	'TOWN', uint32 version, uint32 width, uint32 height, uint32 region count,
+	blocked cells as bits (row by row, most significant bit first, padded to a byte),
+	then a uint32 region id per cell, 0 for blocked cells.
+	Two cells reach each other when they share a non zero region id."""
+
+	ext: str = ".nav"
+	magic: bytes = b"TOWN"
+	version: int = 1
+
+	def __init__(self, width: int, height: int, occluders: Dict[int, dict], cellSize: int):
+		"""'occluders' is {gid: {"size": [w, h], "pos": [x, y], "points": [x, y, ...]}} in pixels"""
+		self.blocked: np.ndarray = np.zeros((height, width), dtype=bool)
+		# the cells only tile occluders block, which is also what stops light
+		self.occluded: np.ndarray = np.zeros((height, width), dtype=bool)
+		self.footprints: Dict[int, List[np.ndarray]] = {
+			gid: [NavGrid.getFootprint(data, cellSize, flipped) for flipped in [False, True]]
+			for gid, data in occluders.items()
+		}
+
+		# gid -> has an occluder, for picking out the occluding cells of a layer at once
+		self.isOccluder: np.ndarray = np.zeros(max(self.footprints, default=0) + 1, dtype=bool)
+		self.isOccluder[list(self.footprints)] = True
+
+	@staticmethod
+	def getFootprint(occluder: dict, cellSize: int, flipped: bool) -> np.ndarray:
+		"""(cells x 2) of (row, column) offsets from the cell the tile is placed on, of the cells whose
+		centre is in the polygon; tiles grow up from their cell, as 'Tiled' draws them"""
+		width, height = occluder["size"]
+		points: np.ndarray = np.array(occluder["points"], dtype=float).reshape(-1, 2) + occluder["pos"]
+		if flipped:
+			points[:, 0] = width - points[:, 0]
+
+		first: np.ndarray = np.floor(points.min(axis=0) / cellSize).astype(int)
+		last: np.ndarray = np.ceil(points.max(axis=0) / cellSize).astype(int)
+		columns, rows = np.meshgrid(np.arange(first[0], last[0]), np.arange(first[1], last[1]))
+		centres: np.ndarray = (np.stack([columns.ravel(), rows.ravel()], axis=1) + 0.5) * cellSize
+
+		inside: np.ndarray = NavGrid._inPolygon(centres, points)
+		bottomRow: int = -(-height // cellSize) - 1
+		return np.stack([rows.ravel()[inside] - bottomRow, columns.ravel()[inside]], axis=1)
+
+	@staticmethod
+	def _inPolygon(xy: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+		"""Even-odd rule for every point against every polygon edge"""
+		x, y = xy[:, :1], xy[:, 1:]
+		x1, y1 = polygon[:, 0], polygon[:, 1]
+		x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+
+		crosses: np.ndarray = (y1 > y) != (y2 > y)
+		with np.errstate(divide="ignore", invalid="ignore"):
+			crossX: np.ndarray = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+		return np.count_nonzero(crosses & (x < crossX), axis=1) % 2 == 1
+
+	def addLayer(self, matrix: np.ndarray, blocking: bool) -> None:
+		"""'blocking' layers block every cell with a tile, besides the tiles' occluders"""
+		if blocking:
+			self.blocked[:matrix.shape[0], :matrix.shape[1]] |= matrix != 0
+
+		tiles: np.ndarray = TileMatrix.clearFlips(matrix)
+		occluding: np.ndarray = np.zeros(tiles.shape, dtype=bool)
+		inTable: np.ndarray = tiles < self.isOccluder.size
+		occluding[inTable] = self.isOccluder[tiles[inTable]]
+
+		rows, columns = np.nonzero(occluding)
+		flipped: np.ndarray = (matrix[rows, columns] & np.uint32(TileMatrix.flip_mask)) != 0
+		keys: np.ndarray = tiles[rows, columns].astype(np.int64) * 2 + flipped
+
+		for key in np.unique(keys).tolist():
+			placed: np.ndarray = keys == key
+			footprint: np.ndarray = self.footprints[key // 2][key % 2]
+			cellRows: np.ndarray = (rows[placed, None] + footprint[:, 0]).ravel()
+			cellColumns: np.ndarray = (columns[placed, None] + footprint[:, 1]).ravel()
+
+			inGrid: np.ndarray = (cellRows >= 0) & (cellRows < self.blocked.shape[0]) \
+				& (cellColumns >= 0) & (cellColumns < self.blocked.shape[1])
+			self.occluded[cellRows[inGrid], cellColumns[inGrid]] = True
+
+		self.blocked |= self.occluded
+
+	def getRegions(self) -> Tuple[np.ndarray, int]:
+		"""(region id per cell, region count); 4-connected walkable cells share an id from 1 up"""
+		height, width = self.blocked.shape
+		walkable: np.ndarray = ~self.blocked
+		regions: np.ndarray = np.zeros(self.blocked.shape, dtype=np.uint32)
+		if not walkable.any():
+			return regions, 0
+
+		# horizontal runs of walkable cells, in row major order
+		padded: np.ndarray = np.zeros((height, width + 2), dtype=np.int8)
+		padded[:, 1:-1] = walkable
+		edges: np.ndarray = np.diff(padded, axis=1)
+		runRows, runStarts = np.nonzero(edges == 1)
+		runEnds: np.ndarray = np.nonzero(edges == -1)[1]
+
+		# runs touching a run of the row below: a contiguous range of that row's runs
+		stride: int = width + 1
+		startKeys: np.ndarray = runRows * stride + runStarts
+		endKeys: np.ndarray = runRows * stride + runEnds
+		first: np.ndarray = np.searchsorted(endKeys, (runRows + 1) * stride + runStarts, side="right")
+		last: np.ndarray = np.searchsorted(startKeys, (runRows + 1) * stride + runEnds, side="left")
+		counts: np.ndarray = np.maximum(last - first, 0)
+		above: np.ndarray = np.repeat(np.arange(runRows.size), counts)
+		below: np.ndarray = np.repeat(first, counts) + np.arange(counts.sum()) \
+			- np.repeat(np.cumsum(counts) - counts, counts)
+
+		# spread the lowest run index over the touching runs until nothing changes
+		labels: np.ndarray = np.arange(runRows.size)
+		while True:
+			lowest: np.ndarray = np.minimum(labels[above], labels[below])
+			merged: np.ndarray = labels.copy()
+			np.minimum.at(merged, above, lowest)
+			np.minimum.at(merged, below, lowest)
+			merged = merged[merged]
+			if np.array_equal(merged, labels):
+				break
+			labels = merged
+
+		_, runRegions = np.unique(labels, return_inverse=True)
+		regions[walkable] = np.repeat(runRegions.astype(np.uint32) + 1, runEnds - runStarts)
+		return regions, int(runRegions.max()) + 1
+
+	def save(self, path: str) -> int:
+		"""Region count"""
+		regions, count = self.getRegions()
+		height, width = self.blocked.shape
+		with open(path, "wb") as outfile:
+			outfile.write(NavGrid.magic + struct.pack("<IIII", NavGrid.version, width, height, count))
+			outfile.write(np.packbits(self.blocked).tobytes())
+			outfile.write(regions.astype("<u4").tobytes())
+		return count
+
+	@staticmethod
+	def read(path: str) -> Tuple[np.ndarray, np.ndarray]:
+		"""(blocked cells, region id per cell)"""
+		with open(path, "rb") as f:
+			buffer: bytes = f.read()
+		if buffer[:4] != NavGrid.magic:
+			raise ValueError("not a nav grid: (%s)" % path)
+
+		_, width, height, _ = struct.unpack_from("<IIII", buffer, 4)
+		bitBytes: int = -(-width * height // 8)
+		blocked = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8, count=bitBytes, offset=20),
+			count=width * height).astype(bool).reshape(height, width)
+		regions = np.frombuffer(buffer, dtype="<u4", offset=20 + bitBytes).astype(np.uint32).reshape(height, width)
+		return blocked, regions
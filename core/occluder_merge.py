@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from typing import *
+
+from .tile_matrix import TileMatrix
+
+
+class OccluderMerge:
+	"""Unions the occluder polygons of a zone's placed tiles into outlines: all polygons get the
+	same winding, so an edge two polygons share runs both ways & cancels out; what's left is
+	chained back into polygons with their collinear vertices dropped. Axis aligned edges are
+	summed per line between every point an edge on it starts or ends, so partly shared edges
+	cancel too, & what's left of a line is joined back into runs before chaining."""
+
+	def __init__(self, occluders: Dict[int, dict], cellSize: int):
+		"""'occluders' is {gid: {"size": [w, h], "pos": [x, y], "points": [x, y, ...]}} in pixels"""
+		self.cellSize: int = cellSize
+		self.outlines: Dict[int, List[np.ndarray]] = {
+			gid: [OccluderMerge.getOutline(data, cellSize, flipped) for flipped in [False, True]]
+			for gid, data in occluders.items()
+		}
+
+		# gid -> has an occluder, for picking out the occluding cells of a layer at once
+		self.isOccluder: np.ndarray = np.zeros(max(self.outlines, default=0) + 1, dtype=bool)
+		self.isOccluder[list(self.outlines)] = True
+
+		self.edges: List[np.ndarray] = list()
+		self.placed: int = 0
+
+	@staticmethod
+	def getOutline(occluder: dict, cellSize: int, flipped: bool) -> np.ndarray:
+		"""(edges x 4) of (x1, y1, x2, y2) from the top left of the cell the tile is placed on,
+		wound one way; tiles grow up from their cell, as 'Tiled' draws them"""
+		width, height = occluder["size"]
+		points: np.ndarray = np.array(occluder["points"], dtype=float).reshape(-1, 2) + occluder["pos"]
+		if flipped:
+			points[:, 0] = width - points[:, 0]
+
+		# one winding for all, so shared edges run opposite ways
+		x, y = points[:, 0], points[:, 1]
+		if np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y) < 0:
+			points = points[::-1]
+
+		points[:, 1] += cellSize - height
+		return np.concatenate([points, np.roll(points, -1, axis=0)], axis=1)
+
+	def addLayer(self, matrix: np.ndarray) -> None:
+		tiles: np.ndarray = TileMatrix.clearFlips(matrix)
+		occluding: np.ndarray = np.zeros(tiles.shape, dtype=bool)
+		inTable: np.ndarray = tiles < self.isOccluder.size
+		occluding[inTable] = self.isOccluder[tiles[inTable]]
+
+		rows, columns = np.nonzero(occluding)
+		flipped: np.ndarray = (matrix[rows, columns] & np.uint32(TileMatrix.flip_mask)) != 0
+		keys: np.ndarray = tiles[rows, columns].astype(np.int64) * 2 + flipped
+		self.placed += rows.size
+
+		for key in np.unique(keys).tolist():
+			placed: np.ndarray = keys == key
+			origins: np.ndarray = np.tile(np.stack([columns[placed], rows[placed]], axis=1), 2) * self.cellSize
+			self.edges.append((origins[:, None, :] + self.outlines[key // 2][key % 2]).reshape(-1, 4))
+
+	def merge(self) -> List[List[float]]:
+		"""Merged polygons as flat [x, y, x, y, ...] lists, in pixels like the tile occluders"""
+		if len(self.edges) == 0:
+			return list()
+
+		edges: np.ndarray = np.round(np.concatenate(self.edges), 6)
+		edges = edges[(edges[:, 0] != edges[:, 2]) | (edges[:, 1] != edges[:, 3])]
+		horizontal: np.ndarray = edges[:, 1] == edges[:, 3]
+		vertical: np.ndarray = edges[:, 0] == edges[:, 2]
+
+		# (edges, how many times each is left) of the horizontal, vertical & sloped edges
+		kept: List[Tuple[np.ndarray, np.ndarray]] = [
+			OccluderMerge._cancelAlong(edges[horizontal], 0),
+			OccluderMerge._cancelAlong(edges[vertical], 1),
+			OccluderMerge._cancelSloped(edges[~horizontal & ~vertical])
+		]
+
+		# how many edge ends meet at each end, a run only goes on through a point no other edge touches
+		inverse: np.ndarray = OccluderMerge._getPointIds(np.concatenate([edges for edges, _ in kept]).reshape(-1, 2))
+		endCounts: np.ndarray = np.bincount(inverse, weights=np.repeat(np.concatenate([counts for _, counts in kept]), 2))
+		endCounts = endCounts[inverse].reshape(-1, 2)
+		horizontalCount: int = kept[0][0].shape[0]
+		kept[0] = OccluderMerge._joinRuns(*kept[0], 0, endCounts[:horizontalCount])
+		kept[1] = OccluderMerge._joinRuns(*kept[1], 1, endCounts[horizontalCount:horizontalCount + kept[1][0].shape[0]])
+
+		edges = np.concatenate([np.repeat(edges, counts, axis=0) for edges, counts in kept])
+		points, loops = OccluderMerge._dropCollinear(*OccluderMerge._chainLoops(edges))
+
+		coords: np.ndarray = points.ravel()
+		integral: np.ndarray = coords == np.round(coords)
+		values: np.ndarray = coords.astype(object)
+		values[integral] = coords[integral].astype(np.int64).tolist()
+		sizes: np.ndarray = np.unique(loops, return_counts=True)[1]
+		return [loop.tolist() for loop in np.split(values, np.cumsum(sizes)[:-1] * 2)] if sizes.size > 0 else list()
+
+	@staticmethod
+	def _getPointIds(points: np.ndarray) -> np.ndarray:
+		"""Same id for the same (x, y)"""
+		return np.unique(points[:, 0] + 1j * points[:, 1], return_inverse=True)[1].ravel()
+
+	@staticmethod
+	def _cancelAlong(edges: np.ndarray, axis: int) -> Tuple[np.ndarray, np.ndarray]:
+		"""Edges along 'axis' -> (the pieces between the breaks of their lines that aren't covered as
+		often both ways, how many more times one way); sorted by line, then along it"""
+		if edges.shape[0] == 0:
+			return np.zeros((0, 4)), np.zeros(0, dtype=int)
+
+		begin, end = edges[:, axis], edges[:, 2 + axis]
+		sign: np.ndarray = np.where(end > begin, 1, -1)
+		lines: np.ndarray = np.tile(edges[:, 1 - axis], 2)
+		at: np.ndarray = np.concatenate([np.minimum(begin, end), np.maximum(begin, end)])
+		delta: np.ndarray = np.concatenate([sign, -sign])
+
+		order: np.ndarray = np.lexsort((at, lines))
+		lines, at, delta = lines[order], at[order], delta[order]
+		breaks: np.ndarray = np.flatnonzero(np.concatenate([[True], (lines[1:] != lines[:-1]) | (at[1:] != at[:-1])]))
+		# every line adds up to 0, so the sum runs on from one line to the next
+		cover: np.ndarray = np.cumsum(np.add.reduceat(delta, breaks))
+		lines, at = lines[breaks], at[breaks]
+
+		pieces: np.ndarray = np.flatnonzero(cover[:-1] != 0)
+		forward: np.ndarray = cover[pieces] > 0
+		begin = np.where(forward, at[pieces], at[pieces + 1])
+		end = np.where(forward, at[pieces + 1], at[pieces])
+		fixed: np.ndarray = lines[pieces]
+		return np.stack([begin, fixed, end, fixed] if axis == 0 else [fixed, begin, fixed, end], axis=1), \
+			np.abs(cover[pieces])
+
+	@staticmethod
+	def _joinRuns(pieces: np.ndarray, counts: np.ndarray, axis: int, endCounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+		"""Back to back pieces the same way & as many times along a line as single edges,
+		where nothing else meets them"""
+		if pieces.shape[0] == 0:
+			return pieces, counts
+
+		begin, end = pieces[:, axis], pieces[:, 2 + axis]
+		forward: np.ndarray = end > begin
+		low: np.ndarray = np.minimum(begin, end)
+		high: np.ndarray = np.maximum(begin, end)
+		lines: np.ndarray = pieces[:, 1 - axis]
+		highCounts: np.ndarray = np.where(forward, endCounts[:, 1], endCounts[:, 0])
+
+		joined: np.ndarray = (lines[1:] == lines[:-1]) & (low[1:] == high[:-1]) \
+			& (forward[1:] == forward[:-1]) & (counts[1:] == counts[:-1]) & (highCounts[:-1] == 2 * counts[:-1])
+		first: np.ndarray = np.concatenate([[True], ~joined])
+		last: np.ndarray = np.concatenate([~joined, [True]])
+
+		forward, lines = forward[first], lines[first]
+		begin = np.where(forward, low[first], high[last])
+		end = np.where(forward, high[last], low[first])
+		return np.stack([begin, lines, end, lines] if axis == 0 else [lines, begin, lines, end], axis=1), counts[first]
+
+	@staticmethod
+	def _cancelSloped(edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+		"""Edges neither axis is fixed on -> (those left once the ones running back over each other
+		end to end cancel, how many more times one way)"""
+		if edges.shape[0] == 0:
+			return np.zeros((0, 4)), np.zeros(0, dtype=int)
+
+		forward: np.ndarray = edges[:, 0] < edges[:, 2]
+		undirected: np.ndarray = np.where(forward[:, None], edges, edges[:, [2, 3, 0, 1]])
+		keys, inverse = np.unique(undirected, axis=0, return_inverse=True)
+		net: np.ndarray = np.bincount(inverse.ravel(), weights=np.where(forward, 1, -1), minlength=keys.shape[0]).astype(int)
+
+		kept: np.ndarray = np.flatnonzero(net)
+		keys = keys[kept]
+		backward: np.ndarray = net[kept] < 0
+		keys[backward] = keys[backward][:, [2, 3, 0, 1]]
+		return keys, np.abs(net[kept])
+
+	@staticmethod
+	def _chainLoops(edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+		"""(the start of every edge, loop after loop, the loop each is in); where outlines touch
+		at a corner, takes the sharpest turn one way, so the loops don't cross"""
+		starts, ends = np.split(OccluderMerge._getPointIds(np.concatenate([edges[:, :2], edges[:, 2:]])), 2)
+		leaving: np.ndarray = np.argsort(starts, kind="stable")
+		outCounts: np.ndarray = np.bincount(starts, minlength=ends.max(initial=-1) + 1)
+		firstOut: np.ndarray = np.cumsum(outCounts) - outCounts
+		following: np.ndarray = leaving[firstOut[ends]]
+
+		# corners with more than one edge out: sweeping round the corner, edges in open & edges out close
+		# like brackets, so each edge in gets the sharpest turn no edge in swept after it took
+		arriving: np.ndarray = np.flatnonzero(outCounts[ends] > 1)
+		if arriving.size > 0:
+			sides: np.ndarray = np.concatenate([arriving, np.flatnonzero(outCounts[starts] > 1)])
+			isIn: np.ndarray = np.arange(sides.size) < arriving.size
+			corners: np.ndarray = np.where(isIn, ends[sides], starts[sides])
+			away: np.ndarray = (edges[sides, 2:] - edges[sides, :2]) * np.where(isIn, -1, 1)[:, None]
+
+			swept: np.ndarray = np.lexsort((isIn, -np.arctan2(away[:, 1], away[:, 0]), corners))
+			sides, isIn, corners = sides[swept], isIn[swept], corners[swept]
+			depths: np.ndarray = np.cumsum(np.where(isIn, 1, -1))
+			levels: np.ndarray = np.where(isIn, depths, depths + 1)
+
+			# at one level of a corner, ins & outs take turns: an in pairs with the next, round the corner
+			paired: np.ndarray = np.lexsort((np.arange(sides.size), levels, corners))
+			sides, isIn, corners, levels = sides[paired], isIn[paired], corners[paired], levels[paired]
+			firsts: np.ndarray = np.concatenate([[True], (corners[1:] != corners[:-1]) | (levels[1:] != levels[:-1])])
+			lasts: np.ndarray = np.append(firsts[1:], True)
+			partners: np.ndarray = np.arange(1, sides.size + 1)
+			partners[lasts] = np.maximum.accumulate(np.where(firsts, np.arange(sides.size), 0))[lasts]
+			following[sides[isIn]] = sides[partners[isIn]]
+
+		# loop of each edge: the lowest edge on it, spread over twice as many edges a round
+		loops: np.ndarray = np.arange(edges.shape[0])
+		jumps: np.ndarray = following
+		while True:
+			ahead: np.ndarray = loops[jumps]
+			if np.array_equal(ahead, loops):
+				break
+			loops = np.minimum(loops, ahead)
+			jumps = jumps[jumps]
+
+		# place on the loop: edges left until the one back to the lowest
+		last: np.ndarray = following == loops
+		remaining: np.ndarray = (~last).astype(np.int64)
+		jumps = np.where(last, np.arange(edges.shape[0]), following)
+		while not np.array_equal(jumps[jumps], jumps):
+			remaining += remaining[jumps]
+			jumps = jumps[jumps]
+
+		order: np.ndarray = np.lexsort((-remaining, loops))
+		return edges[order, :2], loops[order]
+
+	@staticmethod
+	def _dropCollinear(points: np.ndarray, loops: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+		"""Also drops spikes, where the outline doubles back on itself, & the loops it leaves under 3 points"""
+		while points.shape[0] > 0:
+			firsts: np.ndarray = np.flatnonzero(np.concatenate([[True], loops[1:] != loops[:-1]]))
+			lasts: np.ndarray = np.append(firsts[1:], points.shape[0]) - 1
+			previous: np.ndarray = np.arange(-1, points.shape[0] - 1)
+			previous[firsts] = lasts
+			following: np.ndarray = np.arange(1, points.shape[0] + 1)
+			following[lasts] = firsts
+
+			before: np.ndarray = points - points[previous]
+			after: np.ndarray = points[following] - points
+			kept: np.ndarray = np.abs(before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]) >= 1e-9
+			if kept.all():
+				break
+			points, loops = points[kept], loops[kept]
+		return points, loops
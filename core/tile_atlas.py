@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import math
+import numpy as np
+import xml.etree.ElementTree as ET
+from PIL import Image
+from typing import *
+
+
+class TileAtlas:
+	"""Tileset images as arrays of cells (cells x height x width x RGBA)"""
+
+	@staticmethod
+	def loadCells(imgPath: str, cellSize: Tuple[int, int]) -> np.ndarray:
+		"""Cells in tile id order, left to right then top to bottom; 'cellSize' is (width, height)"""
+		with Image.open(imgPath) as img:
+			pixels: np.ndarray = np.asarray(img.convert("RGBA"))
+
+		width, height = cellSize
+		rows: int = pixels.shape[0] // height
+		columns: int = pixels.shape[1] // width
+		return pixels[:rows * height, :columns * width] \
+			.reshape(rows, height, columns, width, 4) \
+			.transpose(0, 2, 1, 3, 4) \
+			.reshape(-1, height, width, 4)
+
+	@staticmethod
+	def getColumns(cells: int, cellSize: Tuple[int, int]) -> int:
+		"""Column count that makes the packed atlas about square"""
+		return max(1, math.ceil(math.sqrt(cells * cellSize[1] / cellSize[0])))
+
+	@staticmethod
+	def pack(cells: np.ndarray, columns: int) -> np.ndarray:
+		"""Lays cells out row by row; inverse of 'loadCells'"""
+		count, height, width, channels = cells.shape
+		rows: int = max(1, math.ceil(count / columns))
+
+		padded: np.ndarray = np.zeros((rows * columns, height, width, channels), dtype=cells.dtype)
+		padded[:count] = cells
+		return padded.reshape(rows, columns, height, width, channels) \
+			.transpose(0, 2, 1, 3, 4) \
+			.reshape(rows * height, columns * width, channels)
+
+	@staticmethod
+	def writeTileset(dest: str, name: str, imgName: str, imgShape: tuple, cellSize: Tuple[int, int],
+		count: int, tiles: List[ET.Element]) -> None:
+		"""'tiles' are <tile> elements already carrying their atlas ids"""
+		root = ET.Element("tileset", {
+			"version": "1.4",
+			"name": name,
+			"tilewidth": str(cellSize[0]),
+			"tileheight": str(cellSize[1]),
+			"tilecount": str(count),
+			"columns": str(imgShape[1] // cellSize[0])
+		})
+		ET.SubElement(root, "image", {
+			"source": imgName,
+			"width": str(imgShape[1]),
+			"height": str(imgShape[0])
+		})
+		root.extend(tiles)
+		ET.ElementTree(root).write(dest, encoding="UTF-8", xml_declaration=True)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import gzip
+import zlib
+import base64
+import numpy as np
+from typing import *
+
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
+
+
+class TileMatrix:
+	"""Tile layers as uint32 arrays (rows x columns of GIDs)"""
+
+	# only the horizontal flip is carried over by the exporter
+	flip_mask: int = 0x80000000
+	encodings: tuple = ("csv", "base64")
+	compressions: tuple = ("", "zlib", "gzip", "zstd")
+
+	@staticmethod
+	def isTileData(data) -> bool:
+		"""Whether a layer's <data> holds a plain matrix; infinite map chunks don't"""
+		return data is not None and data.get("encoding") in TileMatrix.encodings and data.find("chunk") is None
+
+	@staticmethod
+	def fromData(data, width: int) -> np.ndarray:
+		if data.get("encoding") == "csv":
+			return TileMatrix.fromCsv(data.text, width)
+
+		raw: bytes = TileMatrix._decompress(base64.b64decode(data.text.strip()), data.get("compression", ""))
+		return np.frombuffer(raw, dtype="<u4").astype(np.uint32, copy=False).reshape(-1, width)
+
+	@staticmethod
+	def fromCsv(text: str, width: int) -> np.ndarray:
+		return np.fromstring(text, dtype=np.uint32, sep=",").reshape(-1, width)
+
+	@staticmethod
+	def setFormat(data, encoding: str, compression: str) -> None:
+		"""Sets the <data> attributes for 'toText' output"""
+		data.set("encoding", encoding)
+		if encoding == "base64" and compression != "":
+			data.set("compression", compression)
+		elif "compression" in data.keys():
+			del data.attrib["compression"]
+
+	@staticmethod
+	def toText(matrix: np.ndarray, encoding: str, compression: str) -> str:
+		if encoding == "csv":
+			return TileMatrix.toCsv(matrix)
+
+		raw: bytes = TileMatrix._compress(matrix.astype("<u4").tobytes(), compression)
+		return "\n%s\n" % base64.b64encode(raw).decode("ascii")
+
+	@staticmethod
+	def toCsv(matrix: np.ndarray) -> str:
+		"""Same layout 'Tiled' writes: every row on its own line, trailing comma but the last"""
+		return "\n%s\n" % ",\n".join([",".join(map(str, row)) for row in matrix.tolist()])
+
+	@staticmethod
+	def checkCompression(compression: str) -> None:
+		if compression not in TileMatrix.compressions:
+			raise ValueError("unknown layer compression: (%s), defined: %s" % (compression, TileMatrix.compressions[1:]))
+		elif compression == "zstd":
+			TileMatrix._zstd()
+
+	@staticmethod
+	def _decompress(raw: bytes, compression: str) -> bytes:
+		if compression == "zlib":
+			return zlib.decompress(raw)
+		elif compression == "gzip":
+			return gzip.decompress(raw)
+		elif compression == "zstd":
+			return TileMatrix._zstd().ZstdDecompressor().decompressobj().decompress(raw)
+		elif compression == "":
+			return raw
+		raise ValueError("unknown layer compression: (%s)" % compression)
+
+	@staticmethod
+	def _compress(raw: bytes, compression: str) -> bytes:
+		if compression == "zlib":
+			return zlib.compress(raw)
+		elif compression == "gzip":
+			return gzip.compress(raw, mtime=0)
+		elif compression == "zstd":
+			return TileMatrix._zstd().ZstdCompressor().compress(raw)
+		elif compression == "":
+			return raw
+		raise ValueError("unknown layer compression: (%s)" % compression)
+
+	@staticmethod
+	def _zstd():
+		if zstandard is None:
+			raise ValueError("zstd layer compression needs the 'zstandard' package")
+		return zstandard
+
+	@staticmethod
+	def makeLut(ranges: List[Tuple[int, int, int]]) -> np.ndarray:
+		"""Old GID -> new GID table; ranges are (oldFirstgid, cells, newFirstgid), later ones win"""
+		size: int = max([oldFirstgid + cells for oldFirstgid, cells, _ in ranges], default=1)
+		lut: np.ndarray = np.arange(size, dtype=np.uint32)
+
+		for oldFirstgid, cells, newFirstgid in ranges:
+			lut[oldFirstgid:oldFirstgid + cells] = np.arange(newFirstgid, newFirstgid + cells, dtype=np.uint32)
+
+		return lut
+
+	@staticmethod
+	def chainLut(lut: np.ndarray, nextLut: np.ndarray) -> np.ndarray:
+		"""Single table doing 'lut' then 'nextLut'; GIDs outside 'nextLut' keep their 'lut' value"""
+		inNext: np.ndarray = lut < nextLut.size
+		return np.where(inNext, nextLut[np.where(inNext, lut, 0)], lut)
+
+	@staticmethod
+	def clearFlips(tiles: np.ndarray) -> np.ndarray:
+		"""GIDs without the flip bit"""
+		return tiles & np.uint32(~TileMatrix.flip_mask & 0xFFFFFFFF)
+
+	@staticmethod
+	def usedTiles(matrix: np.ndarray) -> np.ndarray:
+		"""Sorted distinct GIDs placed in the layer, flip bit cleared"""
+		return np.unique(TileMatrix.clearFlips(matrix[matrix != 0]))
+
+	@staticmethod
+	def remap(matrix: np.ndarray, lut: np.ndarray) -> np.ndarray:
+		"""GIDs outside the table are left untouched"""
+		flipped: np.ndarray = matrix & np.uint32(TileMatrix.flip_mask)
+		tiles: np.ndarray = TileMatrix.clearFlips(matrix)
+		inTable: np.ndarray = tiles < lut.size
+
+		remapped: np.ndarray = lut[np.where(inTable, tiles, 0)] | flipped
+		return np.where(inTable, remapped, matrix)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+import os
+import copy
+import json
+import bisect
+import hashlib
+import numpy as np
+import xml.etree.ElementTree as ET
+from typing import *
+
+from .image_editor import ImageEditor
+from .map_stream import MapStream
+from .tile_atlas import TileAtlas
+from .map_index import MapIndex
+
+
+class MapCache:
+	"""Parsed map documents shared by every export stage, keyed by path & mtime;
+	when 'streaming', documents are skeletons without their layer data"""
+
+	def __init__(self):
+		self.trees: dict = dict()
+		self.indexes: dict = dict()
+		self.streaming: bool = False
+
+	def clear(self) -> None:
+		self.trees.clear()
+		self.indexes.clear()
+
+	def __getstate__(self) -> dict:
+		"""Copies sent to pool workers start empty; each worker parses only the maps it exports"""
+		return {"trees": dict(), "indexes": dict(), "streaming": self.streaming}
+
+	def setStreaming(self, streaming: bool) -> None:
+		if streaming != self.streaming:
+			self.clear()
+		self.streaming = streaming
+
+	def get(self, mapPath: str) -> ET.ElementTree:
+		"""Shared tree; read only, use 'clone' when the document needs editing"""
+		key: str = os.path.realpath(mapPath)
+		mtime: int = os.stat(key).st_mtime_ns
+
+		if key not in self.trees or self.trees[key][0] != mtime:
+			self.trees[key] = (mtime, MapStream.parseSkeleton(key) if self.streaming else ET.parse(key))
+		return self.trees[key][1]
+
+	def getIndex(self, mapPath: str) -> MapIndex:
+		"""Index of the shared tree; read only like the tree"""
+		tree: ET.ElementTree = self.get(mapPath)
+		key: str = os.path.realpath(mapPath)
+		if key not in self.indexes or self.indexes[key][0] is not tree:
+			self.indexes[key] = (tree, MapIndex(tree.getroot()))
+		return self.indexes[key][1]
+
+	def clone(self, mapPath: str) -> ET.ElementTree:
+		return ET.ElementTree(copy.deepcopy(self.get(mapPath).getroot()))
+
+
+class TilesetIndex:
+	"""Tilesets parsed once into tile id -> {img, properties}, keyed by path & mtime"""
+
+	def __init__(self):
+		self.tilesets: dict = dict()
+
+	def __getstate__(self) -> dict:
+		"""Copies sent to pool workers start empty, like 'MapCache'"""
+		return {"tilesets": dict()}
+
+	def getTiles(self, tilesetPath: str) -> Dict[int, dict]:
+		return self._load(tilesetPath)[1]
+
+	def getTileObjects(self, tilesetPath: str) -> Dict[int, List[dict]]:
+		"""Tile id -> [{template, x, y}] of the template objects in each tile's collision group;
+		template paths as the tileset has them"""
+		return self._load(tilesetPath)[2]
+
+	def _load(self, tilesetPath: str) -> tuple:
+		key: str = os.path.realpath(tilesetPath)
+		mtime: int = os.stat(key).st_mtime_ns
+
+		if key not in self.tilesets or self.tilesets[key][0] != mtime:
+			tiles: Dict[int, dict] = dict()
+			tileObjects: Dict[int, List[dict]] = dict()
+			for tile in ET.parse(key).getroot().findall("tile[@id]"):
+				attributes: dict = dict()
+
+				image = tile.find("image")
+				if image is not None:
+					attributes["img"] = image.get("source")
+				for tileProperty in tile.findall("properties/property"):
+					attributes[tileProperty.get("name")] = tileProperty.get("value")
+
+				tiles[int(tile.get("id"))] = attributes
+				objects: List[dict] = [
+					{"template": item.get("template"), "x": int(item.get("x")), "y": int(item.get("y"))}
+					for item in tile.findall("objectgroup/object[@template]")
+				]
+				if bool(objects):
+					tileObjects[int(tile.get("id"))] = objects
+			self.tilesets[key] = (mtime, tiles, tileObjects)
+
+		return self.tilesets[key]
+
+	def lookup(self, firstgids: List[int], sources: List[str], gid: int) -> dict:
+		"""Copy of the tile attributes for 'gid'; 'firstgids' sorted, 'sources' in the same order"""
+		i: int = bisect.bisect_right(firstgids, gid) - 1
+		if i < 0:
+			return dict()
+		return dict(self.getTiles(sources[i]).get(gid - firstgids[i], dict()))
+
+
+class TemplateRegistry:
+	"""Object templates ('.tx') parsed once into their object's size, polygon & properties,
+	keyed by path & mtime"""
+
+	def __init__(self):
+		self.templates: dict = dict()
+
+	def __getstate__(self) -> dict:
+		"""Copies sent to pool workers start empty, like 'MapCache'"""
+		return {"templates": dict()}
+
+	def get(self, templatePath: str) -> dict:
+		"""{"width", "height", "points": [x, y, ...] or None, "properties": {name: value}}"""
+		key: str = os.path.realpath(templatePath)
+		mtime: int = os.stat(key).st_mtime_ns
+
+		if key not in self.templates or self.templates[key][0] != mtime:
+			item = ET.parse(key).getroot().find("object")
+			polygon = item.find("polygon")
+
+			points: Optional[List[int]] = None
+			if polygon is not None:
+				points = [int(coord) for point in polygon.get("points").split(" ") for coord in point.split(",")]
+
+			self.templates[key] = (mtime, {
+				"width": int(item.get("width", 0)),
+				"height": int(item.get("height", 0)),
+				"points": points,
+				"properties": {
+					templateProperty.get("name"): templateProperty.get("value")
+					for templateProperty in item.findall("properties/property")
+				}
+			})
+
+		return self.templates[key][1]
+
+
+class TileCells:
+	"""Tileset images cut into cells once, keyed by path, mtime & cell size"""
+
+	def __init__(self):
+		self.images: dict = dict()
+
+	def __getstate__(self) -> dict:
+		"""Copies sent to pool workers start empty, like 'MapCache'"""
+		return {"images": dict()}
+
+	def get(self, imgPath: str, cellSize: Tuple[int, int]) -> np.ndarray:
+		"""'TileAtlas.loadCells' of the image"""
+		key: tuple = (os.path.realpath(imgPath), tuple(cellSize))
+		mtime: int = os.stat(key[0]).st_mtime_ns
+
+		if key not in self.images or self.images[key][0] != mtime:
+			self.images[key] = (mtime, TileAtlas.loadCells(key[0], cellSize))
+		return self.images[key][1]
+
+
+class HierarchTable:
+	"""Tileset name -> (level, cells, firstgid); kept in memory and on disk, keyed by
+	the hierarchy settings and every tileset image's size & mtime"""
+
+	file_name: str = "hierarch.json"
+
+	def __init__(self, cacheDir: str):
+		self.cacheDir: str = cacheDir
+		self.key: str = ""
+		self.table: Dict[str, tuple] = dict()
+
+	def get(self, hierarch: dict, tilesets32h: list, tilesetDir: str, imgExt: str) -> Dict[str, tuple]:
+		imgPaths: dict = {name: os.path.join(tilesetDir, name + imgExt) for name in hierarch}
+		key: str = HierarchTable._makeKey(hierarch, tilesets32h, imgPaths)
+
+		if key != self.key:
+			self.table = self._load(key)
+			if not bool(self.table):
+				self.table = HierarchTable._compute(hierarch, tilesets32h, imgPaths)
+				self._save(key)
+			self.key = key
+
+		return dict(self.table)
+
+	@staticmethod
+	def _makeKey(hierarch: dict, tilesets32h: list, imgPaths: dict) -> str:
+		imgStats: dict = dict()
+		for name, imgPath in imgPaths.items():
+			stat = os.stat(imgPath)
+			imgStats[name] = [stat.st_size, stat.st_mtime_ns]
+
+		payload: str = json.dumps([hierarch, sorted(tilesets32h), imgStats], sort_keys=True)
+		return hashlib.sha1(payload.encode()).hexdigest()
+
+	@staticmethod
+	def _compute(hierarch: dict, tilesets32h: list, imgPaths: dict) -> Dict[str, tuple]:
+		table: Dict[str, tuple] = dict()
+		for tilesetName, level in hierarch.items():
+			imgSize: tuple = ImageEditor.get_size(imgPaths[tilesetName])
+			cells: int = -1
+
+			if tilesetName in tilesets32h:
+				cells = imgSize[0] // 16 * imgSize[1] // 32
+			else:
+				cells = imgSize[0] * imgSize[1] // 16**2
+
+			table[tilesetName] = (int(level), int(cells))
+
+		for tilesetName, dataPacket in table.items():
+			firstgid: int = 1
+			for v in table.values():
+				if v[0] < dataPacket[0]:
+					firstgid += v[1]
+
+			table[tilesetName] = (dataPacket[0], dataPacket[1], firstgid)
+
+		return table
+
+	def _load(self, key: str) -> Dict[str, tuple]:
+		path: str = os.path.join(self.cacheDir, HierarchTable.file_name)
+		if os.path.isfile(path):
+			with open(path, "r") as f:
+				data: dict = json.load(f)
+				if data.get("key") == key:
+					return {name: tuple(row) for name, row in data["table"].items()}
+		return dict()
+
+	def _save(self, key: str) -> None:
+		os.makedirs(self.cacheDir, exist_ok=True)
+		with open(os.path.join(self.cacheDir, HierarchTable.file_name), "w") as outfile:
+			json.dump({"key": key, "table": self.table}, outfile, indent="\t")
@@ -2,16 +2,39 @@
 
 import os
 import re
-import csv
+import io
 import json
 import shutil
+import tempfile
+import hashlib
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 import xml.etree.ElementTree as ET
 from distutils.util import strtobool
+import numpy as np
+from PIL import Image
 from typing import *
 
 from .game_db import GameDB, DataBases
 from .image_editor import ImageEditor, Color
 from .path_manager import PathManager
+from .tiled_cache import MapCache, TilesetIndex, HierarchTable, TileCells, TemplateRegistry
+from .tile_matrix import TileMatrix
+from .export_manifest import ExportManifest
+from .map_stream import MapStream
+from .layer_file import LayerFile
+from .used_gids import UsedGids
+from .tile_atlas import TileAtlas
+from .map_chunks import MapChunks
+from .layer_runs import LayerRunFile
+from .nav_grid import NavGrid
+from .light_map import LightMap
+from .occluder_merge import OccluderMerge
+from .map_preview import MapPreview
+from .map_diff import MapDiff
+from .map_stats import MapStats
+from .map_index import MapIndex
+from .file_sync import FileSync
 
 
 class Tiled:
@@ -20,28 +43,59 @@ class Tiled:
 	map_ext: str = ".tmx"
 	tileset_ext = ".tsx"
 	temp_dir: str = "debugging_temp"
+	cache_dir: str = ".export_cache"
+	trim_dir: str = "trimmed"
 	special_units: list = ["critter", "aberration"]
 	cell_size: int = 16
+	# reach of baked lights that have no size of their own, in pixels
+	light_radius: int = 64
+	# pixels a cell in map previews
+	preview_scale: int = 4
 
 	def __init__(self):
 		self.tiled: dict = dict()
 		self.game: dict = dict()
 		self.debug: dict = dict()
 		self.tilesets_32: list = list()
+		self.mapCache: MapCache = MapCache()
+		self.layerFormat: dict = {"encoding": "csv", "compression": ""}
+		self.trimRemap: Optional[dict] = None
+		self.chunkSize: int = 0
+		self.layerRuns: bool = False
+		self.navOccluders: Dict[int, dict] = dict()
+		self.bakeLights: bool = False
+		self.bakeLightPos: Dict[int, list] = dict()
+		self.tilesetIndex: TilesetIndex = TilesetIndex()
+		self.tileCells: TileCells = TileCells()
+		self.templates: TemplateRegistry = TemplateRegistry()
 		data = PathManager.get_paths()
 		self.tiled = data["tiled"]
 		self.tiled["hierarch"] = data["tilesetHierarch"]
 		self.tiled["32hTilesets"] = data["32hTilesets"]
+		self.tiled["navBlockingLayers"] = data.get("navBlockingLayers", [])
 		self.game = data["game"]
 		self.debug = data["debug"]
 		self.tilesets_32 = data["32"]
+		self.tiled["cache_dir"] = os.path.join(self.tiled["map_dir"], Tiled.cache_dir)
+		self.hierarchTable: HierarchTable = HierarchTable(self.tiled["cache_dir"])
 
 	@staticmethod
-	def _debugMapMoveFiles(rootDir: str, destDir: str) -> None:
-		for tileset in os.listdir(rootDir):
-			if tileset.endswith(Tiled.img_ext):
-				src = os.path.join(rootDir, tileset)
-				shutil.copy(src, destDir)
+	def _debugMapLink(src: str, dest: str) -> None:
+		"""Points 'dest' at 'src' in one step, replacing whatever 'dest' was"""
+		tempPath: str = os.path.join(os.path.dirname(dest), ".tmp-" + os.path.basename(dest))
+		if os.path.lexists(tempPath):
+			os.remove(tempPath)
+		os.symlink(os.path.relpath(src, os.path.dirname(dest)), tempPath)
+		os.replace(tempPath, dest)
+
+	@staticmethod
+	def _debugMapRestore(tempDir: str, tilesetDir: str, tilesets: List[str]) -> None:
+		"""Moves the originals kept in 'tempDir' back over their overlay links, then drops 'tempDir'"""
+		for tileset in tilesets:
+			src: str = os.path.join(tempDir, tileset)
+			if os.path.exists(src):
+				os.replace(src, os.path.join(tilesetDir, tileset))
+		shutil.rmtree(tempDir)
 
 	@staticmethod
 	def _getCenterPos(pos: tuple=(), size: tuple=()) -> tuple:
@@ -52,8 +106,34 @@ class Tiled:
 		return (int(x), int(y))
 
 	@staticmethod
-	def _writeXml(tree, dest: str) -> None:
-		tree.write(dest, encoding="UTF-8", xml_declaration=True)
+	def _writeXml(tree, dest: str) -> bool:
+		"""Whether 'dest' changed; leaves it untouched when it already holds the same document,
+		else replaces it whole so readers never see half a file"""
+		buffer = io.BytesIO()
+		tree.write(buffer, encoding="UTF-8", xml_declaration=True)
+		data: bytes = buffer.getvalue()
+
+		if os.path.isfile(dest):
+			with open(dest, "rb") as f:
+				if f.read() == data:
+					return False
+
+		fd, tempPath = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(os.path.abspath(dest)))
+		try:
+			with os.fdopen(fd, "wb") as outfile:
+				outfile.write(data)
+			if os.path.isfile(dest):
+				shutil.copymode(dest, tempPath)
+			else:
+				umask: int = os.umask(0)
+				os.umask(umask)
+				os.chmod(tempPath, 0o666 & ~umask)
+			os.replace(tempPath, dest)
+		except BaseException:
+			if os.path.exists(tempPath):
+				os.remove(tempPath)
+			raise
+		return True
 
 	@staticmethod
 	def _formatName(unitMeta: dict, unitAtts: dict) -> str:
@@ -66,47 +146,36 @@ class Tiled:
 			baseName = unitMeta[unitAtts["id"]]["img"].split("-")[0]
 		return "%s-%s" % (unitAtts["id"], baseName)
 
-	def _getCharacterAttributes(self, root) -> dict:
+	def _getCharacterAttributes(self, mapIndex: MapIndex) -> dict:
 		masterDict: dict = dict()
 		tilesets: dict = dict()
 
-		os.chdir(self.tiled["map_dir"])
-
-		for item in root.findall("tileset"):
+		for firstgid, item in mapIndex.getTilesets().items():
 			if "character" in item.get("source"):
-				tilesets[int(item.get("firstgid"))] = item.get("source")
+				tilesets[firstgid] = os.path.join(self.tiled["map_dir"], item.get("source"))
+
+		firstgids: List[int] = sorted(tilesets.keys())
+		sources: List[str] = [tilesets[firstgid] for firstgid in firstgids]
 
-		for item in root.findall("group/objectgroup[@name='characters']/object"):
+		for item in mapIndex.getObjects("characters"):
 			if "template" in item.keys():
 				continue
 
-			characterID: int = int(item.get("gid"))
-			characterTilesetID: int = -1
-			for tilesetID in tilesets:
-				if characterID >= tilesetID:
-					characterTilesetID = tilesetID
-
-			characterAttr: dict = dict()
 			# set default attributes from tileset
-			for characterItem in ET.parse(tilesets[characterTilesetID]).getroot().findall("tile[@id]"):
-				if int(characterItem.get("id")) == characterID - characterTilesetID:
-
-					characterAttr["img"] = characterItem.find("image").get("source")
-					for characterProperty in characterItem.findall("properties/property"):
-						characterAttr[characterProperty.get("name")] = characterProperty.get("value")
+			characterAttr: dict = self.tilesetIndex.lookup(firstgids, sources, int(item.get("gid")))
 
 			# set map character attributes if set
-			for characterProperty in item.findall("properties/property"):
-				characterAttr[characterProperty.get("name")] = characterProperty.get("value")
+			characterAttr.update(mapIndex.getProperties(item))
 
 			masterDict[item.get("id")] = characterAttr
 		return masterDict
 
-	def _getCharacterNames(self, editorNames: bool, root) -> dict:
-		unitMeta: dict = self._getCharacterAttributes(root)
+	def _getCharacterNames(self, editorNames: bool, mapIndex: MapIndex, unitMeta: Optional[dict]=None) -> dict:
+		if unitMeta is None:
+			unitMeta = self._getCharacterAttributes(mapIndex)
 		names: dict = dict()
 
-		for item in root.findall("group/objectgroup[@name='characters']/object"):
+		for item in mapIndex.getObjects("characters"):
 			name: str = ""
 			if editorNames:
 				name = Tiled._formatName(unitMeta, item.attrib)
@@ -118,11 +187,11 @@ class Tiled:
 
 		return names
 
-	def _getUnitPaths(self, root) -> dict:
+	def _getUnitPaths(self, mapIndex: MapIndex) -> dict:
 		unitsPaths: dict = dict()
-		spawnPos: dict = self._getUnitSpawnLocs(root)
+		spawnPos: dict = self._getUnitSpawnLocs(mapIndex)
 
-		for item in root.findall("group/objectgroup[@name='paths']/object"):
+		for item in mapIndex.getObjects("paths"):
 			if "name" not in item.keys() and not item.get("name").isnumeric():
 				print(f"──> NO NAME SET IN PATH-ID: {item.get('id')}\n──> NAME NEEDS TO BE UNIT-ID\n──> SKIPPING")
 				continue
@@ -140,38 +209,101 @@ class Tiled:
 			unitsPaths[item.get("name")] = points
 		return unitsPaths
 
-	def _getUnitSpawnLocs(self, root) -> dict:
+	def _getUnitSpawnLocs(self, mapIndex: MapIndex) -> dict:
 		spawnPos: dict = dict()
 
-		for item in root.findall("group/objectgroup[@name='characters']/object[@width]"):
-			spawnPos[item.get("id")] = Tiled._getCenterPos(
-				(item.get("x"), item.get("y")), (item.get("width"), item.get("height"))
-			)
+		for item in mapIndex.getObjects("characters"):
+			if "width" in item.keys():
+				spawnPos[item.get("id")] = Tiled._getCenterPos(
+					(item.get("x"), item.get("y")), (item.get("width"), item.get("height"))
+				)
 
 		return spawnPos
 
 	def is_debugging(self):
 		return os.path.exists(os.path.join(self.tiled["map_dir"], Tiled.temp_dir))
 
-	def debug_map(self):
-		os.chdir(self.tiled["map_dir"])
-		debug = True
-		if os.path.exists(Tiled.temp_dir):
-			Tiled._debugMapMoveFiles(Tiled.temp_dir, self.tiled["tileset_dir"])
-			shutil.rmtree(Tiled.temp_dir)
-			debug = False
-		else:
-			os.mkdir(Tiled.temp_dir)
-			Tiled._debugMapMoveFiles(self.tiled["tileset_dir"], Tiled.temp_dir)
-			Tiled._debugMapMoveFiles(self.tiled["debug_dir"], self.tiled["tileset_dir"])
-			with open(os.path.join(Tiled.temp_dir, "README.txt"), "w") as f:
+	def debug_map(self, debug: Optional[bool]=None):
+		"""Toggles the debug overlay unless 'debug' is given. The original tileset images are moved
+		into 'temp_dir' & replaced by links to their overlays, so a swap is a rename & a link per
+		tileset. A journal in 'temp_dir' lets a swap cut short get repaired on the next call."""
+		tempDir: str = os.path.join(self.tiled["map_dir"], Tiled.temp_dir)
+		tilesetDir: str = self.tiled["tileset_dir"]
+
+		interrupted: Optional[str] = self._recoverDebugMap()
+		if debug is None:
+			debug = not os.path.exists(tempDir) and interrupted != "disabling"
+
+		if debug and not os.path.exists(tempDir):
+			tilesets: List[str] = sorted(
+				tileset for tileset in os.listdir(self.tiled["debug_dir"])
+				if tileset.endswith(Tiled.img_ext) and os.path.isfile(os.path.join(tilesetDir, tileset))
+			)
+			os.mkdir(tempDir)
+			with open(os.path.join(tempDir, "README.txt"), "w") as f:
 				f.write("Don't delete folder or contents of folder manually. If you do, you've done messed up.")
+			Tiled._writeDebugJournal(tempDir, "enabling", tilesets)
+
+			for tileset in tilesets:
+				dest: str = os.path.join(tilesetDir, tileset)
+				os.replace(dest, os.path.join(tempDir, tileset))
+				Tiled._debugMapLink(os.path.join(self.tiled["debug_dir"], tileset), dest)
+			Tiled._writeDebugJournal(tempDir, "on", tilesets)
+
+		elif not debug and os.path.exists(tempDir):
+			tilesets = Tiled._readDebugJournal(tempDir)["tilesets"]
+			Tiled._writeDebugJournal(tempDir, "disabling", tilesets)
+			Tiled._debugMapRestore(tempDir, tilesetDir, tilesets)
+
 		print("──> MAP DEBUG OVERLAY: %s\n──> PRESS (CTRL-T) TO REFRESH IF HASN'T SHOWN" % debug)
 
-	def make_debug_tilesets(self):
+	def _recoverDebugMap(self) -> Optional[str]:
+		"""Puts the originals back after a swap that got cut short; returns which way it was going"""
+		tempDir: str = os.path.join(self.tiled["map_dir"], Tiled.temp_dir)
+		if not os.path.exists(tempDir):
+			return None
+
+		journal: dict = Tiled._readDebugJournal(tempDir)
+		if journal["state"] == "on":
+			return None
+
+		Tiled._debugMapRestore(tempDir, self.tiled["tileset_dir"], journal["tilesets"])
+		print("──> MAP DEBUG OVERLAY: RECOVERED FROM AN UNFINISHED SWAP (%s)" % journal["state"])
+		return journal["state"]
+
+	@staticmethod
+	def _writeDebugJournal(tempDir: str, state: str, tilesets: List[str]) -> None:
+		tempPath: str = os.path.join(tempDir, ".journal.json.tmp")
+		with open(tempPath, "w") as outfile:
+			json.dump({"state": state, "tilesets": tilesets}, outfile, indent="\t")
+			outfile.flush()
+			os.fsync(outfile.fileno())
+		os.replace(tempPath, os.path.join(tempDir, "journal.json"))
+
+	@staticmethod
+	def _readDebugJournal(tempDir: str) -> dict:
+		"""Overlays made by copying the images have no journal; their originals are all in 'tempDir'"""
+		path: str = os.path.join(tempDir, "journal.json")
+		if not os.path.isfile(path):
+			return {"state": "on", "tilesets": sorted(
+				tileset for tileset in os.listdir(tempDir) if tileset.endswith(Tiled.img_ext))}
+		with open(path, "r") as f:
+			return json.load(f)
+
+	def make_debug_tilesets(self, workers: int=os.cpu_count() or 1):
+		"""Skips tilesets whose image & colour are as they were when their overlay was made"""
 		defined_color_names = [c.name for c in Color]
 		print("──> MAKING DEBUG TILESETS:")
-		for tileset in os.listdir(self.tiled["tileset_dir"]):
+
+		cachePath: str = os.path.join(self.tiled["cache_dir"], "debugTilesets.json")
+		stamps: dict = dict()
+		if os.path.isfile(cachePath):
+			with open(cachePath, "r") as f:
+				stamps = json.load(f)
+
+		current: dict = dict()
+		jobs: List[tuple] = list()
+		for tileset in sorted(os.listdir(self.tiled["tileset_dir"])):
 			if tileset.endswith(Tiled.img_ext):
 				# check if color is defined
 				if not self.debug[tileset] in defined_color_names:
@@ -183,10 +315,36 @@ class Tiled:
 				# make paths
 				src = os.path.join(self.tiled["tileset_dir"], tileset)
 				dest = os.path.join(self.tiled["debug_dir"], tileset)
-				# create overlay
-				ImageEditor.create_overlay(src, dest, Color[self.debug[tileset]].value)
-				print(" |-> TILESET MADE: (%s)" % dest)
-		print("──> ALL DEBUG TILESETS MADE")
+				color: list = list(Color[self.debug[tileset]].value)
+				current[tileset] = stamps.get(tileset)
+				if current[tileset] is None or current[tileset] != Tiled._getOverlayStamp(src, dest, color):
+					jobs.append((tileset, src, dest, color))
+
+		# create overlays
+		if workers > 1 and len(jobs) > 1:
+			with ProcessPoolExecutor(min(workers, len(jobs))) as pool:
+				list(pool.map(ImageEditor.create_overlay, *list(zip(*jobs))[1:]))
+		else:
+			for _, src, dest, color in jobs:
+				ImageEditor.create_overlay(src, dest, color)
+
+		for tileset, src, dest, color in jobs:
+			current[tileset] = Tiled._getOverlayStamp(src, dest, color)
+			print(" |-> TILESET MADE: (%s)" % dest)
+
+		os.makedirs(self.tiled["cache_dir"], exist_ok=True)
+		with open(cachePath, "w") as outfile:
+			json.dump(current, outfile, indent="\t")
+		print("──> ALL DEBUG TILESETS MADE: (%d) UNCHANGED, SKIPPED" % (len(current) - len(jobs)))
+
+	@staticmethod
+	def _getOverlayStamp(src: str, dest: str, color: list) -> Optional[list]:
+		"""Size & mtime of the tileset & its overlay with the overlay colour; None without an overlay"""
+		if not os.path.isfile(dest):
+			return None
+		srcStat = os.stat(src)
+		destStat = os.stat(dest)
+		return [srcStat.st_size, srcStat.st_mtime_ns, destStat.st_size, destStat.st_mtime_ns, color]
 
 	def make_32_tilesets(self):
 		print("──> MAKING 32px TILESETS:")
@@ -243,31 +401,28 @@ class Tiled:
 		master_list: list = list()
 		for map_file in os.listdir(self.tiled["map_dir"]):
 			if map_file.endswith(Tiled.map_ext):
-				# extract file paths
-				self.tiled["map_file"] = os.path.join(self.tiled["map_dir"], map_file)
-				self.file_name = os.path.splitext(map_file)[0]
 				# get character data
-				unit_data = self._getCharacterMapData()
+				unit_data = self._getCharacterMapData(os.path.join(self.tiled["map_dir"], map_file))
 				for unit_id in unit_data:
 					master_list.append({
 						"img": os.path.join(self.tiled["character_dir"], unit_data[unit_id]["img"] + Tiled.img_ext),
-						"map": os.path.splitext(os.path.basename(self.tiled["map_file"]))[0],
+						"map": os.path.splitext(map_file)[0],
 						"race": unit_data[unit_id]["img"].split("-")[0],
 						"editorName": unit_data[unit_id]["editorName"]
 					})
 		return master_list
 
-	def _getCharacterMapData(self) -> dict:
+	def _getCharacterMapData(self, mapFile: str) -> dict:
 		masterDict: dict = dict()
-		root = ET.parse(self.tiled["map_file"]).getroot()
+		mapIndex: MapIndex = self.mapCache.getIndex(mapFile)
 
-		editorNames: dict = self._getCharacterNames(True, root)
-		gameNames: dict = self._getCharacterNames(False, root)
-		unitMeta: dict = self._getCharacterAttributes(root)
-		unitPatrolPaths: dict = self._getUnitPaths(root)
-		spawnPos: dict = self._getUnitSpawnLocs(root)
+		unitMeta: dict = self._getCharacterAttributes(mapIndex)
+		editorNames: dict = self._getCharacterNames(True, mapIndex, unitMeta)
+		gameNames: dict = self._getCharacterNames(False, mapIndex, unitMeta)
+		unitPatrolPaths: dict = self._getUnitPaths(mapIndex)
+		spawnPos: dict = self._getUnitSpawnLocs(mapIndex)
 
-		for item in root.findall("group/objectgroup[@name='characters']/object"):
+		for item in mapIndex.getObjects("characters"):
 			if "template" in item.keys():
 				continue
 
@@ -287,33 +442,92 @@ class Tiled:
 
 		return masterDict
 
-	def export_tilesets(self):
+	def export_tilesets(self, checksum: bool=False):
+		"""Copies only what changed, so Godot only reimports that; 'checksum' compares the content
+		of files that kept their size but got touched"""
 		print("──> EXPORTING TILESETS")
 
 		for directory in ["light_dir", "tileset_dir"]:
-			if os.path.exists(self.game[directory]):
-				shutil.rmtree(self.game[directory])
-			shutil.copytree(self.tiled[directory], self.game[directory])
+			fileSync: FileSync = FileSync(checksum)
+			fileSync.sync(self.tiled[directory], self.game[directory])
 
-			print(f" |-> DIRECTORY EXPORTED: ({self.game[directory]})")
+			print(f" |-> DIRECTORY EXPORTED: ({self.game[directory]}) %d COPIED, %d REMOVED, %d UNCHANGED"
+				% (len(fileSync.copied), len(fileSync.removed), fileSync.unchanged))
 
+		fileSync = FileSync(checksum)
 		for filename in os.listdir(self.tiled["character_dir"]):
 			if filename.endswith(Tiled.tileset_ext):
 
 				src: str = os.path.join(self.tiled["character_dir"], filename)
 				dest: str = os.path.join(self.game["character_dir"], filename)
-				shutil.copy(src, dest)
-
-				print(f" |-> TILESET EXPORTED: ({dest})")
+				if fileSync.syncFile(src, dest):
+					print(f" |-> TILESET EXPORTED: ({dest})")
 		print("──> ALL TILESETS EXPORTED")
 
-	def _export_map(self, fileName: str):
-		tree = ET.parse(self.tiled["map_file"])
-		root = tree.getroot()
-		editorNames: dict = self._getCharacterNames(True, root)
-		spawnPos: dict = self._getUnitSpawnLocs(root)
+	def _export_map(self, mapContext: dict):
+		fileName: str = mapContext["file_name"]
+		# document gets edited, so work on a copy of the cached map
+		tree = self.mapCache.clone(mapContext["map_file"])
+		mapIndex: MapIndex = MapIndex(tree.getroot())
+		root = mapIndex.root
+		self._setExportObjects(mapIndex)
+		self._standardizeTilesetGroups(mapIndex)
+		dest: str = os.path.join(self.game["map_dir"], fileName + Tiled.map_ext)
+
+		importerDir: str = os.path.join(self.game["meta_dir"], "importer")
+		os.makedirs(importerDir, exist_ok=True)
+		mapContext["used_gids"] = UsedGids(self._getUsedGidSize())
+		mapContext["nav"] = NavGrid(int(root.get("width")), int(root.get("height")), self.navOccluders, Tiled.cell_size)
+		mapContext["occluders"] = OccluderMerge(self.navOccluders, Tiled.cell_size)
+		if self.bakeLights:
+			mapContext["light"] = LightMap(int(root.get("width")), int(root.get("height")),
+				self.bakeLightPos, Tiled.cell_size, Tiled.light_radius)
+		with LayerFile(os.path.join(importerDir, fileName + LayerFile.ext)) as layerFile, \
+			contextlib.ExitStack() as stack:
+			mapContext["layer_file"] = layerFile
+			if self.chunkSize > 0:
+				mapContext["chunks"] = stack.enter_context(
+					MapChunks(self._getChunkPath(fileName), self.chunkSize, Tiled.cell_size))
+			if self.layerRuns:
+				mapContext["layer_runs"] = stack.enter_context(
+					LayerRunFile(os.path.join(importerDir, fileName + LayerRunFile.ext)))
+
+			if self.mapCache.streaming:
+				lut = self._standardizeTilesets(mapIndex, False)
+				MapStream.writeMap(tree, mapContext["map_file"], dest,
+					lambda groupName, layerName, matrix: self._streamLayer(mapContext, lut, groupName, layerName, matrix))
+			else:
+				self._standardizeTilesets(mapIndex, True, mapContext)
+				Tiled._writeXml(tree, dest)
+
+			if "chunks" in mapContext:
+				mapContext["chunks"].addObjects(mapIndex)
+				mapContext.pop("chunks").save((int(root.get("width")), int(root.get("height"))))
+			if "layer_runs" in mapContext:
+				for groupName, layerName, cells, runs in mapContext.pop("layer_runs").stats:
+					print(" |-> RUNS: (%s/%s) %d CELLS -> %d RUNS, %.1f:1"
+						% (groupName, layerName, cells, runs, LayerRunFile.getRatio(cells, runs)))
+			del mapContext["layer_file"]
+
+		navDir: str = os.path.join(self.game["meta_dir"], fileName)
+		os.makedirs(navDir, exist_ok=True)
+		nav: NavGrid = mapContext.pop("nav")
+		regionCount: int = nav.save(os.path.join(navDir, fileName + NavGrid.ext))
+		print(" |-> NAV GRID BAKED: (%s) %d REGIONS" % (fileName, regionCount))
+		self._exportMergedOccluders(mapContext.pop("occluders"), fileName)
+		if "light" in mapContext:
+			self._bakeLightMap(mapContext.pop("light"), fileName, mapIndex, nav.occluded)
+
+		# keyed by the written map, so 'exportUsedTileGid' won't need to rescan it
+		mapContext.pop("used_gids").save(self._getUsedGidCachePath(fileName), UsedGids.hashFile(dest))
+		print("──> MAP: (%s) EXPORTED -> (%s)" % (fileName, dest))
+
+	def _setExportObjects(self, mapIndex: MapIndex) -> None:
+		"""Names & places the map objects as the game expects them"""
+		editorNames: dict = self._getCharacterNames(True, mapIndex)
+		spawnPos: dict = self._getUnitSpawnLocs(mapIndex)
 
-		for item in root.findall("group/objectgroup[@name='characters']/object"):
+		for item in mapIndex.getObjects("characters"):
 			characterID: str = item.get("id")
 			item.set("name", str(editorNames[characterID]))
 			item.set("x", str(spawnPos[characterID][0]))
@@ -322,37 +536,69 @@ class Tiled:
 		targetDummySize: tuple = tuple()
 		for template in os.listdir(self.tiled["template_dir"]):
 			if "targetDummy" in template:
-				item = ET.parse(os.path.join(self.tiled["template_dir"], template)).getroot().find("object")
-				targetDummySize = (int(item.get("width")), int(item.get("height")))
+				templateData: dict = self.templates.get(os.path.join(self.tiled["template_dir"], template))
+				targetDummySize = (templateData["width"], templateData["height"])
 		if bool(targetDummySize):
-			for item in root.findall("group/objectgroup[@name='target_dummys']/object"):
+			for item in mapIndex.getObjects("target_dummys"):
 				spawnPos: tuple = Tiled._getCenterPos((item.get("x"), item.get("y")), targetDummySize)
 				item.set("x", str(spawnPos[0]))
 				item.set("y", str(spawnPos[1]))
 				item.set("name", Tiled._formatName({}, item.attrib))
 
 		for objectGroupName in ["lights", "gravesites"]:
-			for item in root.findall(f"group/objectgroup[@name='{objectGroupName}']/object"):
+			for item in mapIndex.getObjects(objectGroupName):
 				item.set("name", Tiled._formatName(dict(), item.attrib))
 
-		for item in root.findall("group/objectgroup[@name='lightSpace']/object"):
-			connectedLight = item.find("properties/property[@name='light']")
-			name: str = item.get("id") if connectedLight is None else connectedLight.get("value")
+		for item in mapIndex.getObjects("lightSpace"):
+			connectedLight: Optional[str] = mapIndex.getProperty(item, "light")
+			name: str = item.get("id") if connectedLight is None else connectedLight
 			item.set("name", "%s-%s" % (name, item.get("width")))
 
-		for item in root.findall(".//objectgroup[@name='quest']/object"):
-			item.set("name", "%s-quest%s"
-				% (item.get("id"), item.find("properties/property[@name='type']").get("value")))
+		for item in mapIndex.getObjects("quest", True):
+			item.set("name", "%s-quest%s" % (item.get("id"), mapIndex.getProperties(item)["type"]))
+
+	def _exportLayer(self, mapContext: dict, groupName: str, layerName: str, matrix) -> None:
+		"""Every remapped tile layer of the map being exported passes through here"""
+		mapContext["layer_file"].write(groupName, layerName, matrix)
+		mapContext["used_gids"].add(matrix)
+		mapContext["nav"].addLayer(matrix, layerName in self.tiled["navBlockingLayers"])
+		mapContext["occluders"].addLayer(matrix)
+		if "light" in mapContext:
+			mapContext["light"].addLayer(matrix)
+		if "chunks" in mapContext:
+			mapContext["chunks"].addLayer(groupName, layerName, matrix)
+		if "layer_runs" in mapContext:
+			mapContext["layer_runs"].write(groupName, layerName, matrix)
+
+	def _streamLayer(self, mapContext: dict, lut, groupName: str, layerName: str, matrix) -> str:
+		matrix = TileMatrix.remap(matrix, lut)
+		self._exportLayer(mapContext, groupName, layerName, matrix)
+		return TileMatrix.toText(matrix, self.layerFormat["encoding"], self.layerFormat["compression"])
+
+	def _exportMergedOccluders(self, occluderMerge: OccluderMerge, fileName: str) -> None:
+		merged: List[List[float]] = occluderMerge.merge()
+		dest: str = os.path.join(self.game["meta_dir"], fileName, "%s_occluders.json" % fileName)
+		with open(dest, "w") as outfile:
+			json.dump({"occluders": merged}, outfile, indent="\t")
 
-		self._standardizeTilesetGroups(root)
-		self._standardizeTilesets(root)
+		print(" |-> OCCLUDERS MERGED: (%s) %d -> %d" % (fileName, occluderMerge.placed, len(merged)))
 
-		dest: str = os.path.join(self.game["map_dir"], fileName + Tiled.map_ext)
-		Tiled._writeXml(tree, dest)
-		print("──> MAP: (%s) EXPORTED -> (%s)" % (fileName, dest))
+	def _bakeLightMap(self, lightMap: LightMap, fileName: str, mapIndex: MapIndex, occluded) -> None:
+		lightMap.addObjects(mapIndex)
+		light, cached = lightMap.bakeCached(occluded,
+			os.path.join(self.tiled["cache_dir"], "lightMap", fileName + LightMap.cache_ext))
+
+		destDir: str = os.path.join(self.game["meta_dir"], fileName)
+		LightMap.save(os.path.join(destDir, "%s_light%s" % (fileName, LightMap.ext)), light)
+		# light objects the texture stands in for
+		with open(os.path.join(destDir, "%s_light.json" % fileName), "w") as outfile:
+			json.dump({"texelSize": Tiled.cell_size, "lights": lightMap.lightIds}, outfile, indent="\t")
+
+		print(" |-> LIGHT MAP %s: (%s) %d LIGHTS" % ("CACHED" if cached else "BAKED", fileName, len(lightMap.sources)))
 
-	def _exportMapData(self, fileName: str):
-		master_dict = self._getCharacterMapData()
+	def _exportMapData(self, mapContext: dict):
+		fileName: str = mapContext["file_name"]
+		master_dict = self._getCharacterMapData(mapContext["map_file"])
 
 		# reformat data
 		reformattedDict: dict = dict()
@@ -379,36 +625,188 @@ class Tiled:
 
 		print("──> META: (%s) EXPORTED" % fileName)
 
-	def export_all_maps(self, *map_paths):
+	def export_all_maps(self, *map_paths, workers: int=1, force: bool=False, streaming: bool=False,
+		compression: Optional[str]=None, trimmed: bool=False, chunkSize: int=0, layerRuns: bool=False,
+		bakeLights: bool=False):
+		"""'compression' None writes layers as csv, else as base64 with that compression;
+		'trimmed' points maps at the atlases of 'make_trimmed_tilesets';
+		'chunkSize' above 0 also splits the layers into chunks of that many cells a side;
+		'layerRuns' also writes the layers run-length encoded;
+		'bakeLights' also bakes the static light of each map into a texture"""
+		if chunkSize < 0:
+			print("──> CHUNK SIZE: (%d) CAN'T BE NEGATIVE\n──> ABORTING" % chunkSize)
+			return
+		if compression is not None:
+			try:
+				TileMatrix.checkCompression(compression)
+			except ValueError as e:
+				print("──> %s\n──> ABORTING" % str(e).upper())
+				return
+
+		self.trimRemap = None
+		if trimmed:
+			self.trimRemap = self._loadTrimRemap()
+			if self.trimRemap is None:
+				print("──> NO TRIMMED TILESETS MADE, RUN: (TRIM_TILESETS)\n──> ABORTING")
+				return
+
 		if len(map_paths) == 0:
 			# if no args, then export all maps
-			map_paths = []
-			for map_file in os.listdir(self.tiled["map_dir"]):
-				if re.match("zone_\d%s" % Tiled.map_ext , map_file):
-					map_paths.append(os.path.join(self.tiled["map_dir"], map_file))
+			map_paths = self._getMapPaths()
+
+		self.chunkSize = chunkSize
+		self.navOccluders = self._getNavOccluders()
+		self.bakeLights = bakeLights
+		self.bakeLightPos = self._getBakeLightPos() if bakeLights else dict()
+		self.layerRuns = layerRuns
+
+		# each map is parsed once per run and shared by all export stages
+		self.mapCache.clear()
+		self.mapCache.setStreaming(streaming)
+		self.layerFormat = {
+			"encoding": "csv" if compression is None else "base64",
+			"compression": "" if compression is None else compression
+		}
 
+		# only export maps whose inputs changed since their last export
+		manifest: ExportManifest = ExportManifest(self.tiled["cache_dir"])
+		settings: dict = self._getMapSettings()
+		digests: Dict[str, str] = dict()
+		skipped: List[str] = list()
 		for map_file in map_paths:
-			self.tiled["map_file"] = map_file
-			fileName = os.path.splitext(os.path.basename(map_file))[0]
-			self._export_map(fileName)
-			self._exportMapData(fileName)
-			self._exportCharacterQuestDropData(map_file)
+			mapContext: dict = Tiled._makeMapContext(map_file)
+			digest: str = manifest.makeDigest(self._getMapInputs(map_file), settings)
+			if not force and manifest.isCurrent(mapContext["file_name"], digest, self._getMapOutputs(mapContext)):
+				skipped.append(mapContext["file_name"])
+			else:
+				digests[map_file] = digest
+		map_paths = list(digests.keys())
+
+		# a tile the trimmed atlases don't have would be exported as no tile
+		if self.trimRemap is not None:
+			missing: Dict[str, List[int]] = {
+				mapPath: gids for mapPath in map_paths for gids in [self._getUntrimmedGids(mapPath)] if len(gids) > 0
+			}
+			if len(missing) > 0:
+				print("──> TILES NOT IN THE TRIMMED TILESETS:")
+				for mapPath, gids in missing.items():
+					print(" |-> (%s) GIDS: (%s)" % (mapPath, ", ".join([str(gid) for gid in gids])))
+				print("──> RUN: (TRIM_TILESETS) ON EVERY MAP\n──> ABORTING")
+				return
+
+		try:
+			if workers > 1 and len(map_paths) > 1:
+				# warm shared caches before they get copied into the workers
+				self._getHierarchData()
+				with ProcessPoolExecutor(min(workers, len(map_paths)), initializer=_initExportWorker, initargs=(self,)) as pool:
+					for map_file, log in zip(map_paths, pool.map(_exportMapWorker, map_paths)):
+						print(log, end="")
+						manifest.update(Tiled._makeMapContext(map_file)["file_name"], digests[map_file])
+			else:
+				for map_file in map_paths:
+					mapContext: dict = Tiled._makeMapContext(map_file)
+					self._exportMapFile(mapContext)
+					manifest.update(mapContext["file_name"], digests[map_file])
+		finally:
+			manifest.save()
+			self.mapCache.clear()
+
+		if len(skipped) > 0:
+			print("──> MAPS UNCHANGED, SKIPPED: (%s)" % ", ".join(sorted(skipped)))
+		if len(map_paths) > 0:
+			self.exportUsedTileGid()
+
+	def _getMapInputs(self, mapFile: str) -> List[str]:
+		"""Every file the export of 'mapFile' reads; only the skeleton is parsed, maps that turn out
+		unchanged never get their layers read"""
+		mapIndex: MapIndex = MapIndex(MapStream.parseSkeleton(mapFile).getroot())
+		mapDir: str = os.path.dirname(mapFile)
+		inputs: List[str] = [mapFile]
+
+		for item in mapIndex.tilesets:
+			inputs.append(os.path.normpath(os.path.join(mapDir, item.get("source"))))
+		for _, item in mapIndex.getAllObjects(True):
+			if "template" in item.keys():
+				inputs.append(os.path.normpath(os.path.join(mapDir, item.get("template"))))
+		for template in os.listdir(self.tiled["template_dir"]):
+			if "targetDummy" in template:
+				inputs.append(os.path.join(self.tiled["template_dir"], template))
+
+		return inputs
+
+	def _getMapSettings(self) -> dict:
+		"""Settings that change the exported maps; tileset image sizes are part of the hierarchy table"""
+		return {
+			"hierarch": self.tiled["hierarch"],
+			"32hTilesets": self.tiled["32hTilesets"],
+			"table": self._getHierarchData(),
+			"layerFormat": self.layerFormat,
+			"trimmed": "" if self.trimRemap is None else self.trimRemap["digest"],
+			"chunkSize": self.chunkSize,
+			"layerRuns": self.layerRuns,
+			"navOccluders": self.navOccluders,
+			"navBlockingLayers": self.tiled["navBlockingLayers"],
+			"bakeLights": self.bakeLights
+		}
+
+	def _getMapOutputs(self, mapContext: dict) -> List[str]:
+		fileName: str = mapContext["file_name"]
+		destDir: str = os.path.join(self.game["meta_dir"], fileName)
+		outputs: List[str] = [
+			os.path.join(self.game["map_dir"], fileName + Tiled.map_ext),
+			os.path.join(self.game["meta_dir"], "importer", fileName + LayerFile.ext),
+			os.path.join(destDir, "%s.json" % fileName),
+			os.path.join(destDir, fileName + NavGrid.ext),
+			os.path.join(destDir, "%s_occluders.json" % fileName),
+			os.path.join(destDir, "%s_questUnitDrop.json" % fileName)
+		]
+		# as '_exportMapData' writes them
+		if os.path.isfile(os.path.join(self.tiled["map_dir"], fileName + Tiled.map_ext)):
+			outputs.append(os.path.join(destDir, "%s_questLoot.json" % fileName))
+		if self.chunkSize > 0:
+			outputs += [self._getChunkPath(fileName) + ext for ext in [LayerFile.ext, MapChunks.ext]]
+		if self.bakeLights:
+			outputs += [os.path.join(destDir, "%s_light%s" % (fileName, ext)) for ext in [LightMap.ext, ".json"]]
+		if self.layerRuns:
+			outputs.append(os.path.join(self.game["meta_dir"], "importer", fileName + LayerRunFile.ext))
+		return outputs
+
+	def _getChunkPath(self, fileName: str) -> str:
+		"""Shared path of a zone's chunk layers & chunk index, without extension"""
+		return os.path.join(self.game["meta_dir"], "importer", "%s_chunks" % fileName)
+
+	def _getMapPaths(self) -> List[str]:
+		map_paths: List[str] = []
+		for map_file in os.listdir(self.tiled["map_dir"]):
+			if re.match("zone_\d%s" % Tiled.map_ext , map_file):
+				map_paths.append(os.path.join(self.tiled["map_dir"], map_file))
+		return map_paths
 
-	def _standardizeTilesetGroups(self, root) -> None:
+	@staticmethod
+	def _makeMapContext(mapFile: str) -> dict:
+		"""Per-map export state, so maps never share anything through 'self'"""
+		return {
+			"map_file": mapFile,
+			"file_name": os.path.splitext(os.path.basename(mapFile))[0]
+		}
+
+	def _exportMapFile(self, mapContext: dict) -> None:
+		self._export_map(mapContext)
+		self._exportMapData(mapContext)
+		self._exportCharacterQuestDropData(mapContext["map_file"])
+
+	def _standardizeTilesetGroups(self, mapIndex: MapIndex) -> None:
 		horizontalBit: int = 0x80000000
 
-		tilesets: dict = self._getCurrentHierarchData(root)
+		tilesets: dict = self._getCurrentHierarchData(mapIndex)
 		hierarch: dict = self._getHierarchData()
 
-		objectPaths: List[str] = [
-			".//objectgroup[@name='transitionSigns']",
-			".//objectgroup[@name='quest']"
-		]
+		objectGroupNames: List[str] = ["transitionSigns", "quest"]
 
 		data: Dict[ET.Element, str] = {}
 
-		for objectPath in objectPaths:
-			for objects in root.findall(objectPath):
+		for objectGroupName in objectGroupNames:
+			for objects in mapIndex.getObjectGroups(objectGroupName, True):
 
 				if "gid" not in objects.keys():
 				# the case for non-tile objects like area-objects
@@ -416,7 +814,7 @@ class Tiled:
 
 				for gid in tilesets.keys():
 					tilesetName: str = os.path.splitext(os.path.basename(tilesets[gid]["source"]))[0]
-					for item in objects.findall("object"):
+					for item in mapIndex.getGroupObjects(objects):
 
 						tile: int = int(item.get("gid"))
 						flippedH: bool = tile & horizontalBit > 0
@@ -433,85 +831,69 @@ class Tiled:
 		for tileObject, newId in data.items():
 				tileObject.set("gid", newId)
 
-	def _standardizeTilesets(self, root) -> None:
-		horizontalBit: int = 0x80000000
-
-		tilesets: dict = self._getCurrentHierarchData(root)
-		matrices: dict = dict()
-		hierarch: dict = self._getHierarchData()
-
-		for item in root.findall("group/layer"):
-			csvData = item.find("data[@encoding='csv']")
-			if csvData is not None:
-				matrices[item.get("name")] = [
-					[int(c) for c in row if c.isdigit()]
-					for row in csv.reader(csvData.text.split("\n"), delimiter=",")
-					if len(row) > 0
-				]
-
-		# put it all together
-		refTilesets: dict = dict()
-		for gid in tilesets.keys():
-
-			tilesetName: str = os.path.splitext(os.path.basename(tilesets[gid]["source"]))[0]
-			data: dict = {
-				"firstgid": hierarch[tilesetName][2],
-				"tilesetName": tilesetName,
-				"tiles": dict()
-			}
-
-			for layerName, matrix in matrices.items():
-				data["tiles"][layerName] = set()
+	def _standardizeTilesets(self, mapIndex: MapIndex, layers: bool=True, mapContext: Optional[dict]=None):
+		"""Returns the old -> new gid table; 'layers' False leaves the layer data as is,
+		else remapped layers also go through '_exportLayer' when 'mapContext' is given"""
+		self._getCurrentHierarchData(mapIndex)
+		refTilesets: dict = self._getTilesetRanges(mapIndex)
 
-				for i in range(len(matrix)):
-					for j in range(len(matrix[i])):
+		# old -> new gid for every tile of every tileset in the map
+		lut = self._makeMapLut(mapIndex)
 
-						tile: int = matrix[i][j]
-						flippedH: bool = tile & horizontalBit > 0
-						if flippedH:
-							tile &= ~horizontalBit
-
-						if tile >= gid and tile < gid + hierarch[tilesetName][1]:
-							if flippedH:
-								tile |= horizontalBit
-							newTileID: int = tile - gid + hierarch[tilesetName][2]
-
-							data["tiles"][layerName].add((i, j, newTileID))
-
-			refTilesets[gid] = data
-
-		# write new tiles id's to matrix
-		for matrix in matrices.values():
-			for data in refTilesets.values():
-				for layerName, newTileIDPackets in data["tiles"].items():
-					for newTileIDPacket in newTileIDPackets:
-						matrices[layerName][newTileIDPacket[0]][newTileIDPacket[1]] = newTileIDPacket[2]
-
-		# write matrix results to xml
-		for item in root.findall("tileset"):
+		# write new tiles id's to xml
+		for item in mapIndex.tilesets:
 			data: dict = refTilesets[int(item.get("firstgid"))]
 			item.set("firstgid", str(data["firstgid"]))
 			item.set("source", "tilesets/" + data["tilesetName"] + Tiled.tileset_ext)
 
-		for item in root.findall("group/layer"):
-			csvData = item.find("data[@encoding='csv']")
-			if csvData is None:
+		if self.trimRemap is not None:
+			lut = TileMatrix.chainLut(lut, self.trimRemap["lut"])
+			self._setTrimmedTilesets(mapIndex)
+
+			# tile objects point into the atlases like the layers do
+			tileObjects: List[ET.Element] = Tiled._getTileObjects(mapIndex)
+			for item, gid in zip(tileObjects, TileMatrix.remap(Tiled._getTileObjectGids(tileObjects), lut).tolist()):
+				item.set("gid", str(gid))
+
+		for groupName, item in mapIndex.groupLayers:
+			data = item.find("data")
+			if not TileMatrix.isTileData(data):
 				continue
 
-			matrixStr: str = "\n"
-			for row in matrices[item.get("name")]:
-				matrixStr += ",".join([str(c) for c in row]) + ",\n"
-			csvData.text = matrixStr[:-2] + "\n"
+			if layers:
+				matrix = TileMatrix.remap(TileMatrix.fromData(data, int(item.get("width"))), lut)
+				data.text = TileMatrix.toText(matrix, self.layerFormat["encoding"], self.layerFormat["compression"])
+				if mapContext is not None:
+					self._exportLayer(mapContext, groupName, item.get("name"), matrix)
+			TileMatrix.setFormat(data, self.layerFormat["encoding"], self.layerFormat["compression"])
 
 		for tagName in ["characters", "lightSpace"]:
-			for item in root.findall(f"group/objectgroup[@name='{tagName}']/object"):
+			for item in mapIndex.getObjects(tagName):
 				item.set("gid", "0")
 
-	def _getCurrentHierarchData(self, root) -> Dict[int, Dict]:
+		return lut
+
+	def _getTilesetRanges(self, mapIndex: MapIndex) -> Dict[int, dict]:
+		"""Map firstgid -> hierarchy firstgid, cells & name of each map tileset; leaves the map as is"""
+		hierarch: dict = self._getHierarchData()
+		refTilesets: Dict[int, dict] = dict()
+
+		for item in mapIndex.tilesets:
+			if "tilesets" in item.get("source"):
+				tilesetName: str = os.path.splitext(os.path.basename(item.get("source")))[0]
+				refTilesets[int(item.get("firstgid"))] = {
+					"firstgid": hierarch[tilesetName][2],
+					"cells": hierarch[tilesetName][1],
+					"tilesetName": tilesetName
+				}
+
+		return refTilesets
+
+	def _getCurrentHierarchData(self, mapIndex: MapIndex) -> Dict[int, Dict]:
 		tilesets: Dict[int, Dict] = {}
 
 		i: int = 1
-		for item in root.findall("tileset"):
+		for item in list(mapIndex.tilesets):
 			if "tilesets" in item.get("source"):
 				tilesets[int(item.get("firstgid"))] = {
 					"source": item.get("source"),
@@ -519,33 +901,14 @@ class Tiled:
 				}
 				i += 1
 			else:
-				root.remove(item)
+				mapIndex.removeTileset(item)
 
 		return tilesets
 
 	def _getHierarchData(self) -> dict:
-		hierarch: dict = dict()
-		for tilesetName, level in self.tiled["hierarch"].items():
-			tilesetPath: str = os.path.join(self.tiled["tileset_dir"], tilesetName + Tiled.img_ext)
-			imgSize: tuple = ImageEditor.get_size(tilesetPath)
-			cells: int = -1
-
-			if tilesetName in self.tiled["32hTilesets"]:
-				cells = imgSize[0] // 16 * imgSize[1] // 32
-			else:
-				cells = imgSize[0] * imgSize[1] // 16**2
-
-			hierarch[tilesetName] = (int(level), int(cells))
-
-		for tilesetName, dataPacket in hierarch.items():
-			firstgid: int = 1
-			for v in hierarch.values():
-				if v[0] < dataPacket[0]:
-					firstgid += v[1]
-
-			hierarch[tilesetName] = (dataPacket[0], dataPacket[1], firstgid)
-
-		return hierarch
+		"""Tileset name -> (level, cells, firstgid)"""
+		return self.hierarchTable.get(self.tiled["hierarch"], self.tiled["32hTilesets"],
+			self.tiled["tileset_dir"], Tiled.img_ext)
 
 	def exportTilesetData(self) -> None:
 		occluderData: dict = dict()
@@ -560,10 +923,11 @@ class Tiled:
 					shaderData.update(self._getTileShaderData(filepath))
 
 				elif filepath.endswith(Tiled.map_ext):
-					for item in ET.parse(filepath).getroot().findall("group/objectgroup/object"):
-						shaderProperty = item.find("properties/property[@name='shader']")
+					mapIndex: MapIndex = MapIndex(MapStream.parseSkeleton(filepath).getroot())
+					for _, item in mapIndex.getAllObjects():
+						shaderProperty: Optional[str] = mapIndex.getProperty(item, "shader")
 						if shaderProperty is not None:
-							shaderData["%s-%s" % (os.path.splitext(filename)[0], item.get("id"))] = shaderProperty.get("value")
+							shaderData["%s-%s" % (os.path.splitext(filename)[0], item.get("id"))] = shaderProperty
 
 		dest: str = os.path.join(self.game["meta_dir"], "importer")
 		dataPackets: list = [
@@ -573,6 +937,14 @@ class Tiled:
 			(os.path.join(dest, "tilesetLightPos.json"), self._getLightPos())
 		]
 
+		# maps exported with the trimmed atlases ('-t') read these keyed by the trimmed gids
+		trimRemap: Optional[dict] = self._loadTrimRemap()
+		if trimRemap is not None:
+			dataPackets += [
+				(os.path.splitext(path)[0] + "Trimmed.json", self._trimGidKeys(data, trimRemap))
+				for path, data in dataPackets
+			]
+
 		if not os.path.isdir(dest):
 			os.mkdir(dest)
 		for dataPacket in dataPackets:
@@ -582,7 +954,6 @@ class Tiled:
 	def _getOccluderData(self, tilesetPath: str) -> dict:
 		getFileName = lambda filePath: os.path.splitext(os.path.basename(filePath))[0]
 
-		root = ET.parse(tilesetPath).getroot()
 		tilesetName: str = getFileName(tilesetPath)
 
 		master: dict = dict()
@@ -590,29 +961,60 @@ class Tiled:
 		templatePaths: set = set()
 
 		# get all tile occluder data
-		for tile in root.findall("tile"):
-			for item in tile.findall("objectgroup/object[@template]"):
-				if "occluder" in item.get("template"):
+		for tileId, objects in self.tilesetIndex.getTileObjects(tilesetPath).items():
+			for item in objects:
+				if "occluder" in item["template"]:
 
-					tileGid: int = hierarch[tilesetName][2] + int(tile.get("id"))
+					tileGid: int = hierarch[tilesetName][2] + tileId
 					master[tileGid] = {
-						"templateName": getFileName(item.get("template")),
-						"pos": [int(item.get("x")), int(item.get("y"))]
+						"templateName": getFileName(item["template"]),
+						"pos": [item["x"], item["y"]]
 					}
-					templatePaths.add(os.path.join(self.tiled["tileset_dir"], item.get("template")))
+					templatePaths.add(os.path.join(self.tiled["tileset_dir"], item["template"]))
 
 		# get the occluder data
 		for templatePath in templatePaths:
-			polygonTag = ET.parse(templatePath).getroot().find("object/polygon")
-			points: list = list()
-			for point in polygonTag.get("points").split(" "):
-				point = point.split(",")
-				points.append(int(point[0]))
-				points.append(int(point[1]))
-			master[getFileName(templatePath)] = points
+			master[getFileName(templatePath)] = list(self.templates.get(templatePath)["points"])
 
 		return master
 
+	def _getNavOccluders(self) -> Dict[int, dict]:
+		"""Occluder of every tile that has one, as the exported maps number the tiles:
+		{gid: {"size": [w, h], "pos": [x, y], "points": [x, y, ...]}}"""
+		occluders: Dict[int, dict] = dict()
+
+		for tilesetName in self._getHierarchData():
+			data: dict = self._getOccluderData(os.path.join(self.tiled["tileset_dir"], tilesetName + Tiled.tileset_ext))
+			tileHeight: int = Tiled.cell_size * (2 if tilesetName in self.tiled["32hTilesets"] else 1)
+
+			for tileGid, tile in data.items():
+				if type(tileGid) is int:
+					occluders[tileGid] = {
+						"size": [Tiled.cell_size, tileHeight],
+						"pos": tile["pos"],
+						"points": data[tile["templateName"]]
+					}
+
+		return self._trimGidKeys(occluders)
+
+	def _getBakeLightPos(self) -> Dict[int, list]:
+		"""'_getLightPos' with the height of the tiles, as the exported maps number the tiles"""
+		tileHeight: int = Tiled.cell_size * (2 if "buildings" in self.tiled["32hTilesets"] else 1)
+		return self._trimGidKeys({gid: pos + [tileHeight] for gid, pos in self._getLightPos().items()})
+
+	def _trimGidKeys(self, table: Dict[Any, Any], trimRemap: Optional[dict]=None) -> Dict[Any, Any]:
+		"""'table' keyed by the gids of the trimmed atlases when exporting with them ('trimRemap'
+		when given); keys that aren't gids are kept as they are"""
+		trimRemap = self.trimRemap if trimRemap is None else trimRemap
+		if trimRemap is None:
+			return table
+
+		lut = trimRemap["lut"]
+		return {
+			(int(lut[key]) if type(key) is int else key): data for key, data in table.items()
+			if type(key) is not int or (key < lut.size and lut[key] != 0)
+		}
+
 	def _getTileAnimData(self) -> dict:
 		root = ET.parse(os.path.join(self.tiled["tileset_dir"], "terrain" + Tiled.tileset_ext)).getroot()
 
@@ -643,39 +1045,40 @@ class Tiled:
 		hierarch: dict = self._getHierarchData()
 
 		tilesetName: str = "buildings"
-		root = ET.parse(os.path.join(self.tiled["tileset_dir"], tilesetName + Tiled.tileset_ext)).getroot()
+		tilesetPath: str = os.path.join(self.tiled["tileset_dir"], tilesetName + Tiled.tileset_ext)
 
-		for tile in root.findall("tile"):
-			for item in tile.findall("objectgroup/object[@template]"):
-				if "lightPos" in item.get("template"):
+		for tileId, objects in self.tilesetIndex.getTileObjects(tilesetPath).items():
+			for item in objects:
+				if "lightPos" in item["template"]:
 
-					tileGid: int = hierarch[tilesetName][2] + int(tile.get("id"))
-					master[tileGid] = [int(item.get("x")), int(item.get("y"))]
+					tileGid: int = hierarch[tilesetName][2] + tileId
+					master[tileGid] = [item["x"], item["y"]]
 
 		return master
 
 	def _getQuestItemData(self, mapFilepath: str) -> Dict[Optional[str], list]:
 		master: Dict[Optional[str], list] = dict()
-		template: str = "properties/property[@name='%s']"
+		mapIndex: MapIndex = self.mapCache.getIndex(mapFilepath)
 
-		for group in ET.parse(mapFilepath).getroot().findall(".//objectgroup[@name='quest']"):
-			for item in group.findall("object"):
+		for group in mapIndex.getObjectGroups("quest", True):
+			for item in mapIndex.getGroupObjects(group):
 
-				value = item.find(template % "value")
-				questId = item.find(template % "questId")
-				interactType = item.find(template % "type")
+				properties: Dict[str, str] = mapIndex.getProperties(item)
+				value: Optional[str] = properties.get("value")
+				questId: Optional[str] = properties.get("questId")
+				interactType: Optional[str] = properties.get("type")
 
 				if value is None or questId is None or interactType is None:
 					print(f"Error: {item.get('id')} in quests doesn't have all attributes")
 				else:
 
 					payload: dict = {
-						"name": "%s-quest%s" % (item.get("id"), interactType.get("value").capitalize()),
-						"type": interactType.get("value"),
-						"value": value.get("value")
+						"name": "%s-quest%s" % (item.get("id"), interactType.capitalize()),
+						"type": interactType,
+						"value": value
 					}
 
-					quest: Optional[str] = questId.get("value")
+					quest: Optional[str] = questId
 
 					if quest in master:
 						master[quest].append(payload)
@@ -686,30 +1089,329 @@ class Tiled:
 
 	def exportUsedTileGid(self) -> None:
 		"""Exports all used tile GID's; optimizes tileset to way smaller file"""
-		horizontalBit: int = 0x80000000
-		usedGids: set = set()
+		size: int = self._getUsedGidSize()
+		usedGids: UsedGids = UsedGids(size)
 
-		for filename in os.listdir(self.game["map_dir"]):
+		for filename in sorted(os.listdir(self.game["map_dir"])):
 			if not filename.endswith(Tiled.map_ext):
 				continue
 
-			root = ET.parse(os.path.join(self.game["map_dir"], filename)).getroot()
-			for item in root.findall("group/layer"):
-				csvData = item.find("data[@encoding='csv']")
-				if csvData is None:
-					continue
+			# only maps changed since their last scan/export get read
+			mapPath: str = os.path.join(self.game["map_dir"], filename)
+			cachePath: str = self._getUsedGidCachePath(os.path.splitext(filename)[0])
+			digest: str = UsedGids.hashFile(mapPath)
 
-				for row in csv.reader(csvData.text.split("\n"), delimiter=","):
-					for gid in row:
-						if gid.isdigit() and gid != "0":
-							tile: int = int(gid)
-							if tile & horizontalBit > 0:
-								tile &= ~horizontalBit
-							usedGids.add(tile)
+			mapGids: Optional[UsedGids] = UsedGids.load(cachePath, digest)
+			if mapGids is None:
+				mapGids = UsedGids(size)
+				for _, _, matrix in MapStream.iterMatrices(mapPath):
+					mapGids.add(matrix)
+				mapGids.save(cachePath, digest)
+				print(" |-> SCANNED: (%s)" % filename)
+
+			usedGids.union(mapGids)
 
 		dest: str = os.path.join(self.game["meta_dir"], "importer", "usedGid.json")
 		with open(dest, "w") as outfile:
-			json.dump(sorted(list(usedGids)), outfile, indent="\t")
+			json.dump(usedGids.toList(), outfile, indent="\t")
+		print("──> USED GIDS EXPORTED -> (%s)" % dest)
+
+	def _makeMapLut(self, mapIndex: MapIndex):
+		"""Map gid -> hierarchy gid table of the map's tilesets"""
+		return TileMatrix.makeLut([(gid, data["cells"], data["firstgid"])
+			for gid, data in self._getTilesetRanges(mapIndex).items()])
+
+	def _getUsedGidSize(self) -> int:
+		"""One past the last GID of the hierarchy table"""
+		return max([data[2] + data[1] for data in self._getHierarchData().values()], default=1)
+
+	def _getUsedGidCachePath(self, fileName: str) -> str:
+		return os.path.join(self.tiled["cache_dir"], "usedGid", fileName + UsedGids.ext)
+
+	def make_trimmed_tilesets(self, *map_paths) -> None:
+		"""Packs only the tiles placed in the maps into compact atlases and writes the
+		old -> new gid table 'export_all_maps(trimmed=True)' applies"""
+		print("──> MAKING TRIMMED TILESETS")
+		hierarch: dict = self._getHierarchData()
+
+		# used gids as the standard export would write them
+		usedGids: UsedGids = UsedGids(self._getUsedGidSize())
+		self.mapCache.setStreaming(False)
+		for mapPath in (map_paths if len(map_paths) > 0 else self._getMapPaths()):
+			mapIndex: MapIndex = self.mapCache.getIndex(mapPath)
+			lut = self._makeMapLut(mapIndex)
+
+			for _, item in mapIndex.groupLayers:
+				data = item.find("data")
+				if TileMatrix.isTileData(data):
+					usedGids.add(TileMatrix.remap(TileMatrix.fromData(data, int(item.get("width"))), lut))
+			usedGids.add(TileMatrix.remap(Tiled._getTileObjectGids(Tiled._getTileObjects(mapIndex)), lut))
+		self.mapCache.clear()
+
+		used = np.flatnonzero(usedGids.mask)
+		destDir: str = os.path.join(self.game["map_dir"], Tiled.trim_dir)
+		os.makedirs(destDir, exist_ok=True)
+
+		remap: Dict[str, int] = dict()
+		tilesets: List[dict] = list()
+		nextGid: int = 1
+		for atlasName, cellHeight in [(Tiled.trim_dir, 16), (Tiled.trim_dir + "_32", 32)]:
+			cells: list = list()
+			tiles: list = list()
+			oldGids: list = list()
+
+			for tilesetName, (_, cellCount, firstgid) in sorted(hierarch.items(), key=lambda t: t[1][2]):
+				if (32 if tilesetName in self.tiled["32hTilesets"] else 16) != cellHeight:
+					continue
+
+				tileIds = used[(used >= firstgid) & (used < firstgid + cellCount)] - firstgid
+				if tileIds.size == 0:
+					continue
+
+				# keep per tile data (occluders, shaders, animations) with the tile
+				tileData: dict = {
+					int(tile.get("id")): tile for tile in ET.parse(os.path.join(self.tiled["tileset_dir"],
+						tilesetName + Tiled.tileset_ext)).getroot().findall("tile[@id]")
+				}
+				# frames of placed animated tiles go in the atlas too
+				tileIds = np.union1d(tileIds, [
+					int(frame.get("tileid")) for tileId in tileIds.tolist() if tileId in tileData
+					for frame in tileData[tileId].findall("animation/frame")
+				]).astype(int)
+
+				imgPath: str = os.path.join(self.tiled["tileset_dir"], tilesetName + Tiled.img_ext)
+				cells.append(TileAtlas.loadCells(imgPath, (Tiled.cell_size, cellHeight))[tileIds])
+
+				localIds: Dict[int, int] = dict()
+				for tileId in tileIds.tolist():
+					localIds[tileId] = len(oldGids)
+					oldGids.append(firstgid + tileId)
+
+				for tileId in tileIds.tolist():
+					if tileId in tileData:
+						tile = tileData[tileId]
+						tile.set("id", str(localIds[tileId]))
+						for frame in tile.findall("animation/frame"):
+							frame.set("tileid", str(localIds[int(frame.get("tileid"))]))
+						# templates as the game has them, from where the atlas is
+						for item in tile.findall("objectgroup/object[@template]"):
+							item.set("template", os.path.relpath(os.path.join(self.game["tileset_dir"],
+								item.get("template")), destDir).replace(os.sep, "/"))
+						tiles.append(tile)
+
+			if len(oldGids) == 0:
+				continue
+
+			cellSize: tuple = (Tiled.cell_size, cellHeight)
+			atlas = TileAtlas.pack(np.concatenate(cells), TileAtlas.getColumns(len(oldGids), cellSize))
+			Image.fromarray(atlas, "RGBA").save(os.path.join(destDir, atlasName + Tiled.img_ext))
+			TileAtlas.writeTileset(os.path.join(destDir, atlasName + Tiled.tileset_ext), atlasName,
+				atlasName + Tiled.img_ext, atlas.shape, cellSize, len(oldGids), tiles)
+
+			tilesets.append({
+				"firstgid": nextGid,
+				"source": "%s/%s%s" % (Tiled.trim_dir, atlasName, Tiled.tileset_ext)
+			})
+			for i, oldGid in enumerate(oldGids):
+				remap[str(oldGid)] = nextGid + i
+			nextGid += len(oldGids)
+
+			print(" |-> ATLAS MADE: (%s) %d TILES, %dx%d px" % (atlasName, len(oldGids), atlas.shape[1], atlas.shape[0]))
+
+		dest: str = os.path.join(self.game["meta_dir"], "importer", "trimmedGid.json")
+		with open(dest, "w") as outfile:
+			json.dump({"tilesets": tilesets, "remap": remap}, outfile, indent="\t")
+
+		totalCells: int = sum([data[1] for data in hierarch.values()])
+		print("──> TRIMMED TILESETS MADE: %d OF %d TILES KEPT -> (%s)" % (len(remap), totalCells, dest))
+
+	def _loadTrimRemap(self) -> Optional[dict]:
+		src: str = os.path.join(self.game["meta_dir"], "importer", "trimmedGid.json")
+		if not os.path.isfile(src):
+			return None
+
+		with open(src, "r") as f:
+			data: dict = json.load(f)
+
+		# unused gids fall to 0, that is no tile
+		lut = np.zeros(self._getUsedGidSize(), dtype=np.uint32)
+		for oldGid, newGid in data["remap"].items():
+			lut[int(oldGid)] = newGid
+
+		return {
+			"digest": UsedGids.hashFile(src),
+			"tilesets": data["tilesets"],
+			"lut": lut
+		}
+
+	def _getUntrimmedGids(self, mapPath: str) -> List[int]:
+		"""Hierarchy gids placed in the map that 'trimRemap' has no tile for"""
+		mapIndex: MapIndex = MapIndex(MapStream.parseSkeleton(mapPath).getroot())
+		lut = self._makeMapLut(mapIndex)
+
+		usedGids: UsedGids = UsedGids(self.trimRemap["lut"].size)
+		for _, _, matrix in MapStream.iterMatrices(mapPath):
+			usedGids.add(TileMatrix.remap(matrix, lut))
+		usedGids.add(TileMatrix.remap(Tiled._getTileObjectGids(Tiled._getTileObjects(mapIndex)), lut))
+
+		used = np.flatnonzero(usedGids.mask)
+		return used[self.trimRemap["lut"][used] == 0].tolist() + usedGids.extra.tolist()
+
+	@staticmethod
+	def _getTileObjects(mapIndex: MapIndex) -> List[ET.Element]:
+		"""Tile objects whose gids are kept through the export, the ones '_standardizeTilesetGroups' numbers"""
+		return [
+			item for objectGroupName in ["transitionSigns", "quest"]
+			for item in mapIndex.getObjects(objectGroupName, True) if "gid" in item.keys()
+		]
+
+	@staticmethod
+	def _getTileObjectGids(tileObjects: List[ET.Element]) -> np.ndarray:
+		return np.array([int(item.get("gid")) for item in tileObjects], dtype=np.uint32)
+
+	def _setTrimmedTilesets(self, mapIndex: MapIndex) -> None:
+		"""Swaps the map's tilesets for the trimmed atlases"""
+		mapIndex.replaceTilesets([
+			ET.Element("tileset", {"firstgid": str(tileset["firstgid"]), "source": tileset["source"]})
+			for tileset in self.trimRemap["tilesets"]
+		])
+
+	def render_map_previews(self, *map_paths) -> None:
+		"""Preview & minimap images of the exported maps, from their exported layers"""
+		print("──> RENDERING MAP PREVIEWS")
+		for mapPath in (map_paths if len(map_paths) > 0 else self._getMapPaths()):
+			fileName: str = os.path.splitext(os.path.basename(mapPath))[0]
+			gameMapPath: str = os.path.join(self.game["map_dir"], fileName + Tiled.map_ext)
+			layerPath: str = os.path.join(self.game["meta_dir"], "importer", fileName + LayerFile.ext)
+			if not os.path.isfile(gameMapPath) or not os.path.isfile(layerPath):
+				print(" |-> NOT EXPORTED, SKIPPED: (%s)" % fileName)
+				continue
+
+			tilesets, tilesetDigest = self._getPreviewTilesets(gameMapPath)
+			preview: MapPreview = MapPreview(tilesets, Tiled.cell_size, Tiled.preview_scale, tilesetDigest)
+			image, drawn, cached = preview.render([matrix for _, _, matrix in LayerFile.read(layerPath)],
+				os.path.join(self.tiled["cache_dir"], "preview", fileName))
+
+			destDir: str = os.path.join(self.game["meta_dir"], fileName)
+			os.makedirs(destDir, exist_ok=True)
+			dest: str = os.path.join(destDir, "%s_preview%s" % (fileName, Tiled.img_ext))
+			Image.fromarray(image, "RGBA").save(dest)
+			Image.fromarray(MapPreview.downscale(image, Tiled.preview_scale), "RGBA").save(
+				os.path.join(destDir, "%s_minimap%s" % (fileName, Tiled.img_ext)))
+
+			print(" |-> PREVIEW: (%s) %d CHUNKS DRAWN, %d CACHED -> (%s)" % (fileName, drawn, cached, dest))
+		print("──> MAP PREVIEWS RENDERED")
+
+	def _getPreviewTilesets(self, mapPath: str) -> Tuple[List[Tuple[int, Any]], str]:
+		"""([(firstgid, cells)] of the map's tilesets, digest of their images)"""
+		tilesets: List[Tuple[int, Any]] = list()
+		stamps: list = list()
+
+		for item in MapIndex(MapStream.parseSkeleton(mapPath).getroot()).tilesets:
+			tilesetPath: str = os.path.join(os.path.dirname(mapPath), item.get("source"))
+			root = ET.parse(tilesetPath).getroot()
+			imgPath: str = os.path.join(os.path.dirname(tilesetPath), root.find("image").get("source"))
+
+			cells = self.tileCells.get(imgPath, (int(root.get("tilewidth")), int(root.get("tileheight"))))
+			tilesets.append((int(item.get("firstgid")), cells[:int(root.get("tilecount", len(cells)))]))
+			stat = os.stat(imgPath)
+			stamps.append([item.get("firstgid"), imgPath, stat.st_size, stat.st_mtime_ns])
+
+		return tilesets, hashlib.sha1(json.dumps(stamps).encode()).hexdigest()
+
+	def diff_maps(self, *map_paths) -> None:
+		"""Two paths compares those maps; else each dev map (all if none given) against its exported map"""
+		if len(map_paths) == 2:
+			pairs: List[tuple] = [(map_paths[0], map_paths[1], False)]
+		else:
+			pairs = [
+				(os.path.join(self.game["map_dir"], os.path.basename(mapPath)), mapPath, True)
+				for mapPath in (map_paths if len(map_paths) > 0 else self._getMapPaths())
+			]
+
+		for oldPath, newPath, asExported in pairs:
+			if not os.path.isfile(oldPath) or not os.path.isfile(newPath):
+				print("──> DIFF: MISSING MAP, SKIPPED: (%s) -> (%s)" % (oldPath, newPath))
+				continue
+
+			diff: dict = self.diffMaps(oldPath, newPath, asExported)
+			print("──> DIFF: (%s) -> (%s)" % (oldPath, newPath))
+			for (groupName, layerName), layer in diff["layers"].items():
+				if layer["status"] == "changed":
+					print(" |-> LAYER: (%s/%s) %d CELLS CHANGED IN %s, CHUNKS: %s" % (groupName, layerName,
+						layer["cells"], layer["bounds"], " ".join(["%d,%d" % chunk for chunk in layer["chunks"]])))
+				else:
+					print(" |-> LAYER: (%s/%s) %s" % (groupName, layerName, layer["status"].upper()))
+			for groupName, changes in diff["objects"].items():
+				print(" |-> OBJECTS: (%s) %s" % (groupName, " ".join(["%s: %s" % (change.upper(), objectIds)
+					for change, objectIds in changes.items() if len(objectIds) > 0])))
+			if not any(diff.values()):
+				print(" |-> NO CHANGES")
+
+	def diffMaps(self, oldPath: str, newPath: str, asExported: bool=False) -> dict:
+		"""{"layers": 'MapDiff.diffLayers', "objects": 'MapDiff.diffObjects'} with gids of both maps
+		numbered by the tileset hierarchy; 'asExported' compares 'newPath' objects as the export writes them"""
+		newIndex: MapIndex = MapIndex(self.mapCache.clone(newPath).getroot())
+		if asExported:
+			self._setExportObjects(newIndex)
+
+		return {
+			"layers": MapDiff.diffLayers(self._getStandardLayers(oldPath), self._getStandardLayers(newPath),
+				MapPreview.chunk_size),
+			"objects": MapDiff.diffObjects(MapDiff.getObjects(MapIndex(MapStream.parseSkeleton(oldPath).getroot())),
+				MapDiff.getObjects(newIndex))
+		}
+
+	def _getStandardLayers(self, mapPath: str) -> Dict[Tuple[str, str], Any]:
+		"""Tile layers numbered by the tileset hierarchy, whichever tilesets the map uses"""
+		mapIndex: MapIndex = MapIndex(MapStream.parseSkeleton(mapPath).getroot())
+		lut = self._makeMapLut(mapIndex)
+
+		# maps exported with the trimmed atlases go back to the hierarchy gids
+		trimRemap: Optional[dict] = self._loadTrimRemap()
+		if trimRemap is not None and any([item.get("source").startswith(Tiled.trim_dir + "/")
+			for item in mapIndex.tilesets]):
+			oldGids = np.flatnonzero(trimRemap["lut"])
+			untrim = np.arange(int(trimRemap["lut"].max()) + 1, dtype=np.uint32)
+			untrim[trimRemap["lut"][oldGids]] = oldGids
+			lut = TileMatrix.chainLut(lut, untrim)
+
+		return {
+			(groupName, layerName): TileMatrix.remap(matrix, lut)
+			for groupName, layerName, matrix in MapStream.iterMatrices(mapPath)
+		}
+
+	def export_map_stats(self, *map_paths) -> None:
+		"""Asset cost of each dev map (all if none given) as json & a table"""
+		hierarch: dict = self._getHierarchData()
+		mapStats: MapStats = MapStats(hierarch, {
+			name: Tiled.cell_size * (2 if name in self.tiled["32hTilesets"] else 1) for name in hierarch
+		}, Tiled.cell_size)
+
+		master: Dict[str, dict] = dict()
+		for mapPath in sorted(map_paths if len(map_paths) > 0 else self._getMapPaths()):
+			fileName: str = os.path.splitext(os.path.basename(mapPath))[0]
+			master[fileName] = mapStats.getStats(self._getStandardLayers(mapPath),
+				MapIndex(MapStream.parseSkeleton(mapPath).getroot()))
+
+		dest: str = os.path.join(self.tiled["map_dir"], "mapStats.json")
+		with open(dest, "w") as outfile:
+			json.dump(master, outfile, indent="\t")
+
+		toMb = lambda size: "%.2f" % (size / 1048576.0)
+		rows: List[list] = [["ZONE", "TILES", "GIDS", "TILESETS", "CHARACTERS", "LIGHTS", "QUEST", "LIGHT SPACE",
+			"TEXTURE MB", "TRIMMED MB"]]
+		for fileName, stats in master.items():
+			objects: dict = stats["objects"]
+			rows.append([fileName, stats["tiles"], stats["distinctGids"], len(stats["tilesets"]),
+				objects.get("characters", 0), objects.get("lights", 0), objects.get("quest", 0),
+				objects.get("lightSpace", 0), toMb(stats["textureBytes"]), toMb(stats["trimmedTextureBytes"])])
+
+		widths: List[int] = [max([len(str(row[i])) for row in rows]) for i in range(len(rows[0]))]
+		print("──> MAP STATS:")
+		for row in rows:
+			print(" | " + " | ".join([str(cell).rjust(width) for cell, width in zip(row, widths)]))
+		print("──> MAP STATS EXPORTED -> (%s)" % dest)
 
 	def exportCsvs(self):
 		for filename in os.listdir(self.game["map_dir"]):
@@ -717,27 +1419,43 @@ class Tiled:
 				continue
 
 			tileData: dict = dict()
-			root = ET.parse(os.path.join(self.game["map_dir"], filename)).getroot()
 
-			for group in root.findall("group"):
-				tileData[group.get("name")] = dict()
+			for groupName, item in MapStream.iterLayers(os.path.join(self.game["map_dir"], filename)):
+				if item is None:
+					tileData[groupName] = dict()
+					continue
 
-				for item in group.findall("layer"):
-					csvData = item.find("data[@encoding='csv']")
-					if csvData is not None:
-						tileData[group.get("name")][item.get("name")] = [
-							[int(c) for c in row if c.isdigit()]
-							for row in csv.reader(csvData.text.split("\n"), delimiter=",")
-							if len(row) > 0
-						]
+				data = item.find("data")
+				if TileMatrix.isTileData(data):
+					tileData[groupName][item.get("name")] = \
+						TileMatrix.fromData(data, int(item.get("width"))).tolist()
 
 			dest: str = os.path.join(self.game["meta_dir"], "importer", os.path.splitext(filename)[0] + ".json")
 			with open(dest, "w") as outfile:
 				json.dump(tileData, outfile, indent="\t")
 
-	def setCharacterTilesetProperties(self) -> None:
+	def setCharacterTilesetProperties(self, workers: int=os.cpu_count() or 1) -> None:
 		"""So that all tiles in 'Tiled' have by default these defined propertiess"""
+		filepaths: List[str] = [
+			os.path.join(self.tiled["character_dir"], filename)
+			for filename in sorted(os.listdir(self.tiled["character_dir"]))
+			if filename.endswith(Tiled.tileset_ext)
+		]
+
+		if workers > 1 and len(filepaths) > 1:
+			with ProcessPoolExecutor(min(workers, len(filepaths))) as pool:
+				changed: List[bool] = list(pool.map(Tiled._setCharacterProperties, filepaths))
+		else:
+			changed = [Tiled._setCharacterProperties(filepath) for filepath in filepaths]
 
+		for filepath, isChanged in zip(filepaths, changed):
+			if isChanged:
+				print(" |-> PROPERTIES ADDED: (%s)" % filepath)
+		print("──> CHARACTER PROPERTIES SET: (%d/%d) TILESETS CHANGED" % (sum(changed), len(filepaths)))
+
+	@staticmethod
+	def _setCharacterProperties(filepath: str) -> bool:
+		"""Whether the tileset had missing properties & got rewritten"""
 		characterAtlas: dict = {
 			"enemy": {"type": "bool", "value":"false"},
 			"level": {"type": "int", "value": "1"},
@@ -746,38 +1464,37 @@ class Tiled:
 		}
 		characterAttributes: set = set(characterAtlas.keys())
 
-		for filename in os.listdir(self.tiled["character_dir"]):
-			if filename.endswith(Tiled.tileset_ext):
-
-				filepath: str = os.path.join(self.tiled["character_dir"], filename)
-				tree = ET.parse(filepath)
+		tree = ET.parse(filepath)
+		added: bool = False
 
-				for character in tree.getroot().findall("tile"):
-					characterProperties = character.find("properties")
+		for character in tree.getroot().findall("tile"):
+			characterProperties = character.find("properties")
 
-					attributes: set = set()
-					if characterProperties is None:
-						characterProperties = ET.SubElement(character, "properties")
-					else:
-						for characterProperty in characterProperties:
-							attributes.add(characterProperty.get("name"))
+			attributes: set = set()
+			if characterProperties is None:
+				characterProperties = ET.SubElement(character, "properties")
+			else:
+				for characterProperty in characterProperties:
+					attributes.add(characterProperty.get("name"))
 
-					for prop in characterAttributes - attributes:
-						attribute = ET.SubElement(characterProperties, "property", {
-							"name": prop,
-							"value": characterAtlas[prop]["value"]
-						})
-						if "type" in characterAtlas[prop].keys():
-							attribute.set("type", characterAtlas[prop]["type"])
+			for prop in characterAttributes - attributes:
+				attribute = ET.SubElement(characterProperties, "property", {
+					"name": prop,
+					"value": characterAtlas[prop]["value"]
+				})
+				if "type" in characterAtlas[prop].keys():
+					attribute.set("type", characterAtlas[prop]["type"])
+				added = True
 
-				Tiled._writeXml(tree, filepath)
+		# as 'Tiled' saved it otherwise; writing it back would only reformat it
+		return added and Tiled._writeXml(tree, filepath)
 
 	def _exportCharacterQuestDropData(self, mapPath) -> None:
 
-		root = ET.parse(mapPath).getroot()
+		mapIndex: MapIndex = self.mapCache.getIndex(mapPath)
 
-		unitData: dict = self._getCharacterAttributes(root)
-		editorNames: dict = self._getCharacterNames(True, root)
+		unitData: dict = self._getCharacterAttributes(mapIndex)
+		editorNames: dict = self._getCharacterNames(True, mapIndex, unitData)
 		exportData: dict = dict()
 
 		for unitId, properties in unitData.items():
@@ -810,3 +1527,19 @@ class Tiled:
 		dest: str = os.path.join(self.game["meta_dir"], zoneName, "%s_questUnitDrop.json" % zoneName)
 		with open(dest, "w") as outfile:
 			json.dump(masterDict, outfile, indent="\t")
+
+
+_worker_tiled: Optional[Tiled] = None
+
+
+def _initExportWorker(tiled: Tiled) -> None:
+	global _worker_tiled
+	_worker_tiled = tiled
+
+
+def _exportMapWorker(mapFile: str) -> str:
+	"""Exports one map in a pool process; returns what it printed"""
+	log = io.StringIO()
+	with contextlib.redirect_stdout(log):
+		_worker_tiled._exportMapFile(Tiled._makeMapContext(mapFile))
+	return log.getvalue()
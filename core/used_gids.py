@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import os
+import hashlib
+import numpy as np
+from typing import *
+
+from .tile_matrix import TileMatrix
+
+
+class UsedGids:
+	"""Set of placed tile GIDs as a boolean array indexed by GID; GIDs past the
+	end of the array (vertical/diagonal flips) are kept aside in 'extra'"""
+
+	ext: str = ".npz"
+
+	def __init__(self, size: int):
+		self.mask: np.ndarray = np.zeros(size, dtype=bool)
+		self.extra: np.ndarray = np.zeros(0, dtype=np.uint32)
+
+	def add(self, matrix: np.ndarray) -> None:
+		tiles: np.ndarray = TileMatrix.usedTiles(matrix)
+		inMask: np.ndarray = tiles < self.mask.size
+		self.mask[tiles[inMask]] = True
+		self.extra = np.union1d(self.extra, tiles[~inMask])
+
+	def union(self, other: "UsedGids") -> None:
+		if other.mask.size > self.mask.size:
+			self.mask = np.pad(self.mask, (0, other.mask.size - self.mask.size))
+		self.mask[:other.mask.size] |= other.mask
+		self.extra = np.union1d(self.extra, other.extra)
+
+	def toList(self) -> List[int]:
+		return np.flatnonzero(self.mask).tolist() + self.extra.tolist()
+
+	def save(self, path: str, digest: str) -> None:
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		with open(path, "wb") as outfile:
+			np.savez(outfile, digest=np.array(digest), size=np.array(self.mask.size),
+				mask=np.packbits(self.mask), extra=self.extra)
+
+	@staticmethod
+	def load(path: str, digest: str) -> Optional["UsedGids"]:
+		"""None if there's no cache at 'path' or it was made from another map digest"""
+		if not os.path.isfile(path):
+			return None
+
+		with np.load(path) as data:
+			if str(data["digest"]) != digest:
+				return None
+
+			usedGids = UsedGids(0)
+			usedGids.mask = np.unpackbits(data["mask"], count=int(data["size"])).astype(bool)
+			usedGids.extra = data["extra"]
+			return usedGids
+
+	@staticmethod
+	def hashFile(path: str) -> str:
+		with open(path, "rb") as f:
+			return hashlib.sha1(f.read()).hexdigest()
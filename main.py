@@ -13,16 +13,20 @@ from core.game_dialogue import GameDialogue
 
 
 class Commands(enum.Enum):
-	EXPORT_MAPS = "OPTIONAL ARG: (FILE_PATH: *.tmx files) || NONE: ALL MAPS"
-	EXPORT_TILESETS = enum.auto()
-	EXPORT_ALL_TILED = enum.auto()
+	EXPORT_MAPS = "OPTIONAL ARGS: (-j[WORKERS]: PARALLEL EXPORT) (-f: ALSO UNCHANGED MAPS) (-s: STREAM LAYERS, LOW MEMORY) (-z[zlib|gzip|zstd]: BASE64 LAYERS) (-t: TRIMMED TILESETS) (-c[SIZE]: ALSO CHUNKED LAYERS) (-r: ALSO RUN-LENGTH LAYERS) (-l: BAKE LIGHT MAPS) (FILE_PATH: *.tmx files) || NONE: ALL MAPS"
+	EXPORT_TILESETS = "OPTIONAL ARG: (-h: ALSO HASH TOUCHED FILES OF THE SAME SIZE); ONLY CHANGED FILES ARE COPIED"
+	EXPORT_ALL_TILED = "OPTIONAL ARGS: (-h: ALSO HASH TOUCHED TILESET FILES OF THE SAME SIZE) (-j[WORKERS]: PARALLEL MAP EXPORT) (-f: ALSO UNCHANGED MAPS) (-s: STREAM LAYERS, LOW MEMORY) (-z[zlib|gzip|zstd]: BASE64 LAYERS) (-t: TRIMMED TILESETS) (-c[SIZE]: ALSO CHUNKED LAYERS) (-r: ALSO RUN-LENGTH LAYERS) (-l: BAKE LIGHT MAPS)"
 	EXPORT_DATABASES = enum.auto()
 	EXPORT_CONTENT = "ARGS: (contentFilePaths)"
 	EXPORT_QUEST = "ARGS: (questFilePaths)"
 	EXPORT_NAMEDB = enum.auto()
 	EXPORT_AUDIO = enum.auto()
 	EXPORT_USED_GID = enum.auto()
+	TRIM_TILESETS = "OPTIONAL ARGS: SAME AS EXPORT_MAPS; PACKS USED TILES INTO ATLASES & EXPORTS MAPS WITH THEM"
 	EXPORT_TILE_CSV = enum.auto()
+	DIFF_MAPS = "OPTIONAL ARGS: (OLD_FILE_PATH NEW_FILE_PATH: *.tmx files) || (FILE_PATH: DEV MAP AGAINST ITS EXPORT) || NONE: ALL DEV MAPS AGAINST THEIR EXPORT"
+	MAP_STATS = "OPTIONAL ARGS: (FILE_PATH: *.tmx files) || NONE: ALL MAPS"
+	RENDER_MAP_PREVIEWS = "OPTIONAL ARGS: (FILE_PATH: *.tmx files) || NONE: ALL MAPS; MAPS NEED EXPORTING FIRST"
 	SET_CHAR_PROP = enum.auto()
 	DEBUG_MAP = enum.auto()
 	MAKE_DEBUG_TILESETS = enum.auto()
@@ -61,6 +65,34 @@ class Main:
 		for font in Font:
 			print(" ├─> ", font.name)
 
+	@staticmethod
+	def split_export_options(args: tuple) -> tuple:
+		"""Pulls '-j[WORKERS]' ('-j' alone uses every core), '-f', '-s', '-t', '-r', '-l', '-z[COMPRESSION]'
+		('-z' alone is zlib) & '-c[SIZE]' ('-c' alone is 32 cells) out of the args"""
+		options: dict = {"workers": 1, "force": False, "streaming": False, "compression": None, "trimmed": False,
+			"chunkSize": 0, "layerRuns": False, "bakeLights": False}
+		rest: list = list()
+		for arg in args:
+			if arg.startswith("-j"):
+				options["workers"] = int(arg[2:]) if arg[2:].isdigit() else os.cpu_count()
+			elif arg == "-f":
+				options["force"] = True
+			elif arg == "-s":
+				options["streaming"] = True
+			elif arg == "-t":
+				options["trimmed"] = True
+			elif arg == "-r":
+				options["layerRuns"] = True
+			elif arg == "-l":
+				options["bakeLights"] = True
+			elif arg.startswith("-c"):
+				options["chunkSize"] = int(arg[2:]) if arg[2:].isdigit() else 32
+			elif arg.startswith("-z"):
+				options["compression"] = arg[2:] if len(arg) > 2 else "zlib"
+			else:
+				rest.append(arg)
+		return options, tuple(rest)
+
 	def execute_command(self, command, *arg):
 		if not command in [c.name for c in Commands]:
 			print(f"──> UNKNOWN COMMAND: ({command})\n──> TYPE HELP FOR ALL COMMANDS")
@@ -69,19 +101,20 @@ class Main:
 		command = Commands[command]
 
 		if command == Commands.EXPORT_MAPS:
-			self.tiled.export_all_maps(*arg)
+			options, arg = Main.split_export_options(arg)
+			self.tiled.export_all_maps(*arg, **options)
 
 		elif command == Commands.EXPORT_TILESETS:
 			if self.tiled.is_debugging():
-				self.tiled.debug_map()
-			self.tiled.export_tilesets()
+				self.tiled.debug_map(False)
+			self.tiled.export_tilesets("-h" in arg)
 			self.tiled.exportTilesetData()
 
 		elif command == Commands.EXPORT_ALL_TILED:
 			if self.tiled.is_debugging():
-				self.tiled.debug_map()
-			self.tiled.export_tilesets()
-			self.tiled.export_all_maps()
+				self.tiled.debug_map(False)
+			self.tiled.export_tilesets("-h" in arg)
+			self.tiled.export_all_maps(**Main.split_export_options(arg)[0])
 			self.tiled.exportTilesetData()
 
 		elif command == Commands.EXPORT_DATABASES:
@@ -102,9 +135,26 @@ class Main:
 		elif command == Commands.EXPORT_USED_GID:
 			self.tiled.exportUsedTileGid()
 
+		elif command == Commands.TRIM_TILESETS:
+			if self.tiled.is_debugging():
+				self.tiled.debug_map(False)
+			options, arg = Main.split_export_options(arg)
+			options["trimmed"] = True
+			self.tiled.make_trimmed_tilesets(*arg)
+			self.tiled.export_all_maps(*arg, **options)
+
 		elif command == Commands.EXPORT_TILE_CSV:
 			self.tiled.exportCsvs()
 
+		elif command == Commands.DIFF_MAPS:
+			self.tiled.diff_maps(*arg)
+
+		elif command == Commands.MAP_STATS:
+			self.tiled.export_map_stats(*arg)
+
+		elif command == Commands.RENDER_MAP_PREVIEWS:
+			self.tiled.render_map_previews(*arg)
+
 		elif command == Commands.SET_CHAR_PROP:
 			self.tiled.setCharacterTilesetProperties()
 
@@ -113,17 +163,17 @@ class Main:
 
 		elif command == Commands.MAKE_DEBUG_TILESETS:
 			if self.tiled.is_debugging():
-				self.tiled.debug_map()
+				self.tiled.debug_map(False)
 			self.tiled.make_debug_tilesets()
 
 		elif command == Commands.MAKE_32_TILESETS:
 			if self.tiled.is_debugging():
-				self.tiled.debug_map()
+				self.tiled.debug_map(False)
 			self.tiled.make_32_tilesets()
 
 		elif command == Commands.MAKE_32_DEBUG_TILESETS:
 			if self.tiled.is_debugging():
-				self.tiled.debug_map()
+				self.tiled.debug_map(False)
 			self.tiled.make_32_tilesets()
 			self.tiled.make_debug_tilesets()
 